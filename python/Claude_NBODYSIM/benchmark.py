@@ -0,0 +1,322 @@
+# benchmark.py
+"""
+Throughput benchmarks for the N-body engine.
+
+    python benchmark.py                                   # default sweep
+    python benchmark.py --n 100 1000 10000 --backend direct barnes_hut \\
+        --integrator leapfrog --dtype float32 float64 --out bench/today
+    python benchmark.py --render --render-n 10 100 1000   # draw calls too
+
+For every (n, backend, integrator, dtype) case this times one force
+evaluation and a few whole sim_steps, and reports
+    steps_per_sec        whole steps (integrator included)
+    force_evals_per_sec  single force evaluations
+    interactions_per_sec n * (n - 1) / force time — direct-sum equivalent,
+                         so tree / mesh backends read as their speed-up
+    peak_mib             peak traced allocation during one step
+
+Every run also checks accuracy against a brute-force float64
+reference, for each (backend, dtype):
+    max_rel_error        worst |a - a_ref| / |a_ref| over the checked rows
+on two sets of bodies — a sample of ACCURACY_ROWS rows of a
+scenario with ACCURACY_N bodies, and a close pair (CLOSE_PAIR_GAP apart at
+x = 100) next to a unit cloud, where expanding |x_j - x_i|^2 cancels badly.
+--check exits non-zero when a direct-summation backend is worse than
+DIRECT_TOLERANCE for its dtype.
+
+Results go to <out>.json (with machine info) and <out>.csv so runs can
+be compared over time. Before each larger n, the step time is
+extrapolated from the previous n with the backend's COST_SCALING; a case
+expected (or measured) to take longer than --max-step-seconds is skipped,
+along with the rest of that series. hermite_block always sums directly,
+so it is only run, and labelled, as "direct".
+
+--render times the functions in scripts/render.py against synthetic
+bodies in a hidden window; it is the only part that needs pyray. It
+has its own, smaller n sweep (--render-n): every body carries a full
+trail, and a million of them would be gigabytes before any drawing.
+Each case draws a warm-up frame (first-call mesh uploads) and reports
+the mean of --render-frames frames after it.
+"""
+import argparse
+import csv
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+from scripts.arrows    import build_arrows
+from scripts.body      import BodyStore
+from scripts.physics   import FORCE_BACKENDS, INTEGRATOR_NAMES, compute_forces, sim_step, active_backend
+from scripts.scenarios import build_scenario
+from scripts.state     import SimulationState
+
+DEFAULT_N = [3, 10, 100, 1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_RENDER_N = [10, 100, 1_000, 10_000, 100_000]
+
+# accuracy checks: scenario size, rows compared, and the close pair's separation / softening
+ACCURACY_N     = 2_000
+ACCURACY_ROWS  = 32
+CLOSE_PAIR_GAP = 0.02
+CLOSE_PAIR_EPS = [0.1, 0.01, 0.0]
+
+# worst relative error --check accepts from the direct-summation backends
+DIRECT_TOLERANCE = {"float32": 1e-5, "float64": 1e-8}
+DIRECT_BACKENDS  = ["direct", "direct_parallel"]
+
+# how a step's cost grows with n, to skip a case before running it
+COST_SCALING = {
+    "direct"          : lambda n: n * n,
+    "direct_parallel" : lambda n: n * n,
+    "barnes_hut"      : lambda n: n * np.log2(max(n, 2)),
+    "particle_mesh"   : lambda n: n,
+}
+
+FIELDS = ["kind", "name", "n", "backend", "integrator", "dtype",
+          "steps_per_sec", "force_evals_per_sec", "interactions_per_sec",
+          "peak_mib", "seconds", "max_rel_error", "case", "skipped"]
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="N-body benchmark suite")
+    p.add_argument("--n",          type=int, nargs="+", default=DEFAULT_N)
+    p.add_argument("--backend",    nargs="+", default=list(FORCE_BACKENDS), choices=list(FORCE_BACKENDS))
+    p.add_argument("--integrator", nargs="+", default=["leapfrog"], choices=INTEGRATOR_NAMES)
+    p.add_argument("--dtype",      nargs="+", default=["float64"], choices=["float32", "float64"])
+    p.add_argument("--scenario",   default="plummer")
+    p.add_argument("--steps",      type=int,   default=3, help="timed steps per case")
+    p.add_argument("--dt",         type=float, default=1.0 / 480)
+    p.add_argument("--max-step-seconds", type=float, default=10.0)
+    p.add_argument("--render",     action="store_true", help="also time scripts/render.py draw calls")
+    p.add_argument("--render-n",   type=int, nargs="+", default=DEFAULT_RENDER_N)
+    p.add_argument("--render-frames", type=int, default=5, help="timed frames per --render case")
+    p.add_argument("--trail-len",  type=int, default=300, help="trail points per body for --render")
+    p.add_argument("--check",      action="store_true",
+                   help="exit non-zero if a direct backend fails the accuracy check")
+    p.add_argument("--out",        default="benchmark_results", help="output path without extension")
+    return p
+
+
+def bench_physics(n, backend, integrator, dtype, args):
+    """Time one force evaluation and args.steps whole steps."""
+    sim = SimulationState(force_backend=backend, integrator=integrator)
+    bodies = build_scenario(args.scenario, n, 0, sim.gravity_constant, np.dtype(dtype))
+    n = len(bodies)
+
+    # warm-up: first-call costs (kernel caches, FSAL acceleration) stay out of the numbers
+    compute_forces(bodies, sim)
+
+    t = time.perf_counter()
+    compute_forces(bodies, sim)
+    force_s = time.perf_counter() - t
+
+    tracemalloc.start()
+    t = time.perf_counter()
+    sim_step(bodies, args.dt, sim)
+    first_s = time.perf_counter() - t
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    steps = 1
+    total = first_s
+    while steps < args.steps and total < args.max_step_seconds:
+        t = time.perf_counter()
+        sim_step(bodies, args.dt, sim)
+        total += time.perf_counter() - t
+        steps += 1
+
+    step_s = total / steps
+    return dict(
+        kind="physics", name="sim_step", n=n, backend=backend, integrator=integrator, dtype=dtype,
+        steps_per_sec=1.0 / step_s,
+        force_evals_per_sec=1.0 / force_s,
+        interactions_per_sec=n * (n - 1) / force_s,
+        peak_mib=peak / 2**20,
+        seconds=step_s,
+        skipped=False,
+    )
+
+
+def physics_cases(args):
+    """(backend, integrator) pairs to time, labelled with the backend that actually runs."""
+    cases = []
+    for backend in args.backend:
+        for integrator in args.integrator:
+            # hermite_block ignores force_backend, so every backend would time the same direct sum
+            case = (active_backend(SimulationState(force_backend=backend, integrator=integrator)), integrator)
+            if case not in cases:
+                cases.append(case)
+    return cases
+
+
+def run_physics(args, report):
+    for backend, integrator in physics_cases(args):
+        cost = COST_SCALING[backend]
+        for dtype in args.dtype:
+            last = None
+            too_slow = False
+            for n in sorted(args.n):
+                row = dict(kind="physics", name="sim_step", n=n, backend=backend,
+                           integrator=integrator, dtype=dtype, skipped=True)
+                if not too_slow and last is not None:
+                    # extrapolate before running: a 100k direct step alone takes minutes
+                    too_slow = last["seconds"] * cost(n) / cost(last["n"]) > args.max_step_seconds
+                if not too_slow:
+                    row = last = bench_physics(n, backend, integrator, dtype, args)
+                    too_slow = row["seconds"] > args.max_step_seconds
+                report(row)
+
+
+def reference_accelerations(pos, mass, G, softening, rows):
+    """Brute force in float64 with explicit differences — the yardstick for every backend."""
+    p, m = pos.astype(np.float64), mass.astype(np.float64)
+    out = np.zeros((len(rows), 3))
+    for k, i in enumerate(rows):
+        d  = p - p[i]
+        r2 = np.einsum("ij,ij->i", d, d) + softening * softening
+        w  = np.zeros(len(p))
+        np.divide(m, r2 * np.sqrt(r2), out=w, where=r2 > 0)
+        w[i] = 0.0
+        out[k] = G * (w @ d)
+    return out
+
+
+def accuracy_cases(args, dtype):
+    """(case name, bodies, softening, rows checked) for the accuracy rows."""
+    bodies = build_scenario(args.scenario, ACCURACY_N, 0, SimulationState().gravity_constant, np.dtype(dtype))
+    rows = np.random.default_rng(0).choice(len(bodies), min(ACCURACY_ROWS, len(bodies)), replace=False)
+    yield args.scenario, bodies, SimulationState().softening, rows
+
+    rng = np.random.default_rng(1)
+    pos = np.vstack((rng.normal(size=(200, 3)), [[100.0, 0, 0], [100.0 + CLOSE_PAIR_GAP, 0, 0]]))
+    pair = BodyStore(pos, np.zeros_like(pos), np.ones(len(pos)), np.ones(len(pos)), dtype=np.dtype(dtype))
+    for eps in CLOSE_PAIR_EPS:
+        yield f"close_pair eps={eps:g}", pair, eps, np.array([200, 201])
+
+
+def run_accuracy(args, report):
+    """Max relative error of every backend against reference_accelerations(); False if --check fails."""
+    ok = True
+    for backend in args.backend:
+        for dtype in args.dtype:
+            for case, bodies, eps, rows in accuracy_cases(args, dtype):
+                sim = SimulationState(force_backend=backend, softening=eps)
+                acc = FORCE_BACKENDS[backend](bodies.pos, bodies.mass, sim)[rows]
+                ref = reference_accelerations(bodies.pos, bodies.mass, sim.gravity_constant, eps, rows)
+                err = float(np.max(np.linalg.norm(acc - ref, axis=1) / np.linalg.norm(ref, axis=1)))
+                report(dict(kind="accuracy", name="accelerations", case=case, n=len(bodies),
+                            backend=backend, dtype=dtype, max_rel_error=err, skipped=False))
+                if backend in DIRECT_BACKENDS and not err <= DIRECT_TOLERANCE[dtype]:
+                    ok = False
+    return ok
+
+
+def synthetic_bodies(n, trail_len, rng):
+    """Random bodies with full-length trails, for draw-call timing."""
+    bodies = BodyStore(rng.normal(size=(n, 3)) * 100, rng.normal(size=(n, 3)),
+                       rng.uniform(1, 10, n), rng.uniform(1, 5, n))
+    bodies.G, bodies.softening = 0.01, 0.1
+    bodies.acc[:] = rng.normal(size=(n, 3))
+    bodies.arrows = build_arrows(bodies)
+    bodies.trails.configure(trail_len, 1)
+    # random walk one point at a time, in float32 like the buffer itself
+    p = bodies.pos.astype(np.float32)
+    for _ in range(trail_len):
+        p += rng.standard_normal((n, 3), dtype=np.float32)
+        bodies.trails.push(p)
+    return bodies
+
+
+def run_render(args, report, max_seconds=2.0):
+    """Time each draw function inside a real frame in a hidden window."""
+    import pyray as rl
+    from utils.labels   import queue_labels, flush_labels
+    from scripts.render import draw_bodies, draw_trails, draw_gravity_lines, draw_force_vectors
+
+    rl.set_config_flags(rl.FLAG_WINDOW_HIDDEN)
+    rl.set_trace_log_level(rl.LOG_WARNING)
+    rl.init_window(640, 360, "benchmark")
+    camera = rl.Camera3D((0, 0, 400), (0, 0, 0), (0, 1, 0), 45, rl.CAMERA_PERSPECTIVE)
+    cases = {
+        "draw_bodies"        : lambda b: draw_bodies(b, queue_labels, camera),
+        "draw_trails"        : lambda b: draw_trails(b),
+        "draw_gravity_lines" : lambda b: draw_gravity_lines(b),
+        "draw_force_vectors" : lambda b: draw_force_vectors(b, queue_labels, camera),
+    }
+    rng = np.random.default_rng(0)
+    try:
+        for name, fn in cases.items():
+            too_slow = False
+            for n in sorted(args.render_n):
+                row = dict(kind="render", name=name, n=n, skipped=True)
+                if not too_slow:
+                    bodies = synthetic_bodies(n, args.trail_len, rng)
+                    frames = []
+                    for _ in range(1 + max(1, args.render_frames)):
+                        rl.begin_drawing()
+                        rl.begin_mode_3d(camera)
+                        t = time.perf_counter()
+                        fn(bodies)
+                        rl.end_mode_3d()
+                        flush_labels()
+                        rl.end_drawing()
+                        frames.append(time.perf_counter() - t)
+                        if frames[0] > max_seconds:
+                            break
+                    # the first frame uploads meshes, only the ones after it are timed
+                    seconds = float(np.mean(frames[1:])) if len(frames) > 1 else frames[0]
+                    row = dict(kind="render", name=name, n=n, seconds=seconds, skipped=False)
+                    too_slow = seconds > max_seconds
+                report(row)
+    finally:
+        rl.close_window()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    rows = []
+
+    def report(row):
+        rows.append(row)
+        if row["skipped"]:
+            what = f"{row['backend']:14} {row['integrator']:16} {row['dtype']:8}" if row["kind"] == "physics" else f"{row['name']:20}"
+            print(f"{row['kind']:8} {what} n={row['n']:<9} skipped (too slow at this n)")
+        elif row["kind"] == "accuracy":
+            print(f"accuracy {row['backend']:14} {row['case']:16} {row['dtype']:8} n={row['n']:<9} "
+                  f"{row['max_rel_error']:10.3g} max rel error")
+        elif row["kind"] == "physics":
+            print(f"physics  {row['backend']:14} {row['integrator']:16} {row['dtype']:8} n={row['n']:<9} "
+                  f"{row['steps_per_sec']:10.2f} steps/s  {row['interactions_per_sec']:10.3g} int/s  "
+                  f"{row['peak_mib']:8.1f} MiB")
+        else:
+            print(f"render   {row['name']:20} n={row['n']:<9} {row['seconds'] * 1e3:10.2f} ms")
+
+    run_physics(args, report)
+    accurate = run_accuracy(args, report)
+    if args.render:
+        run_render(args, report)
+
+    meta = dict(
+        timestamp = time.strftime("%Y-%m-%dT%H:%M:%S"),
+        python    = platform.python_version(),
+        numpy     = np.__version__,
+        machine   = platform.machine(),
+        processor = platform.processor(),
+        system    = platform.platform(),
+        args      = vars(args),
+    )
+    with open(args.out + ".json", "w") as f:
+        json.dump(dict(meta=meta, results=rows), f, indent=2)
+    with open(args.out + ".csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, restval="")
+        writer.writeheader()
+        writer.writerows(rows)
+
+    if args.check and not accurate:
+        sys.exit("accuracy check failed: a direct backend is outside DIRECT_TOLERANCE")
+
+
+if __name__ == "__main__":
+    main()
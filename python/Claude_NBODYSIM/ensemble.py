@@ -0,0 +1,176 @@
+# ensemble.py
+"""
+Fan a grid of independent headless simulations out over a process pool.
+
+    python ensemble.py --scenario plummer --n 500 --steps 2000 \\
+        --G 0.005 0.01 0.02 --time-scale 0.5 1 2 --softening 0.1 1 \\
+        --seed 0 1 2 3 --results sweeps/plummer.jsonl
+
+Every combination of --G x --time-scale x --softening x --seed is one
+run. Runs are built through headless.make_state, i.e. the same SimState
+and scenario code as the interactive app, and stepped with --dt scaled
+by time_scale exactly like main.py scales a frame.
+
+Each finished run appends one JSON line to --results (energy drift,
+escapers, final diagnostics). Rerunning the same command skips every
+run already recorded, so an interrupted sweep picks up where it left off.
+With --snapshots, each run's final bodies go to a file named after its
+run_key (snapshot_name), recorded in its result line as "snapshot".
+"""
+import argparse
+import concurrent.futures as cf
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import time
+import traceback
+import numpy as np
+
+import headless
+from scripts.diagnostics import potentials
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Parameter-sweep runner for headless simulations")
+    p.add_argument("--results",    required=True, help="JSON-lines file, appended to and used for resume")
+    p.add_argument("--jobs",       type=int, default=0, help="worker processes, 0 = every core")
+    p.add_argument("--scenario",   default="default")
+    p.add_argument("--n",          type=int,   default=None)
+    p.add_argument("--steps",      type=int,   default=1000)
+    p.add_argument("--dt",         type=float, default=1.0 / 480, help="sim time per step at time_scale 1")
+    p.add_argument("--backend",    default="direct")
+    p.add_argument("--integrator", default="symplectic_euler")
+    p.add_argument("--G",          type=float, nargs="+", default=[0.01])
+    p.add_argument("--time-scale", type=float, nargs="+", default=[1.0])
+    p.add_argument("--softening",  type=float, nargs="+", default=[0.1])
+    p.add_argument("--seed",       type=int,   nargs="+", default=[0])
+    p.add_argument("--snapshots",  default=None, help="directory for each run's final .npz (optional)")
+    return p
+
+
+def grid(args):
+    """Every run's parameters, as plain dicts."""
+    fixed = dict(scenario=args.scenario, n=args.n, steps=args.steps, dt=args.dt,
+                 backend=args.backend, integrator=args.integrator)
+    for G, ts, eps, seed in itertools.product(args.G, args.time_scale, args.softening, args.seed):
+        yield dict(fixed, G=G, time_scale=ts, softening=eps, seed=seed)
+
+
+def run_key(params):
+    return json.dumps(params, sort_keys=True)
+
+
+def snapshot_name(params):
+    """File name for a run's final snapshot: the swept values for reading, a run_key hash for uniqueness."""
+    digest = hashlib.sha1(run_key(params).encode()).hexdigest()[:12]
+    return "run_" + "_".join(f"{k}{params[k]}" for k in ("G", "time_scale", "softening", "seed")) + f"_{digest}.npz"
+
+
+def energies(bodies, sim):
+    """Total energy and number of unbound bodies (positive energy in the centre-of-mass frame)."""
+    m   = bodies.mass.astype(np.float64)
+    v   = bodies.vel.astype(np.float64)
+    v  -= np.average(v, axis=0, weights=m)
+    # same approximation as the run's force backend (diagnostics.potentials)
+    phi = potentials(bodies, sim)
+    ke  = 0.5 * m * (v * v).sum(axis=1)
+    total = float(ke.sum() + 0.5 * (m * phi).sum())
+    escapes = int(((ke / m + phi) > 0.0).sum()) if len(m) > 1 else 0
+    return total, escapes
+
+
+def run_one(params, snapshots=None):
+    """One headless run — executed in a worker process."""
+    args = headless.build_parser().parse_args([])
+    args.scenario, args.n, args.seed   = params["scenario"], params["n"], params["seed"]
+    args.steps, args.backend           = params["steps"], params["backend"]
+    args.integrator                    = params["integrator"]
+    args.G, args.softening             = params["G"], params["softening"]
+    args.dt         = params["dt"] * params["time_scale"]
+    args.diag_every = 0
+    args.out        = None
+
+    state = headless.make_state(args)
+    e0, esc0 = energies(state.bodies, state.sim)
+    start = time.perf_counter()
+    final = headless.run(args, state=state)
+    wall  = time.perf_counter() - start
+    e1, esc1 = energies(state.bodies, state.sim)
+
+    snapshot = None
+    if snapshots:
+        # every parameter goes into the name, so sweeps over other scenarios / n / steps can share the directory
+        os.makedirs(snapshots, exist_ok=True)
+        snapshot = os.path.join(snapshots, snapshot_name(params))
+        headless.save_snapshot(snapshot, state.bodies, state.sim.simulation_time)
+
+    return dict(
+        n_bodies       = len(state.bodies),
+        energy_start   = e0,
+        energy_end     = e1,
+        energy_drift   = (e1 - e0) / abs(e0) if e0 else float("nan"),
+        escapes_start  = esc0,
+        escapes_end    = esc1,
+        wall           = wall,
+        final          = final,
+        snapshot       = snapshot,
+    )
+
+
+def _safe_run(params, snapshots):
+    try:
+        return run_one(params, snapshots)
+    except Exception:
+        return dict(error=traceback.format_exc())
+
+
+def completed_keys(path):
+    """Keys of runs already in the results file (failed runs are retried)."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                # a line cut short by an interrupted write
+                continue
+            if "error" not in rec:
+                done.add(rec["key"])
+    return done
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    done = completed_keys(args.results)
+    runs = list(grid(args))
+    # the results file may also hold other sweeps' runs, count only this grid's
+    todo = [p for p in runs if run_key(p) not in done]
+    recorded, total = len(runs) - len(todo), len(runs)
+    print(f"{recorded} of {total} runs already recorded, {len(todo)} to go")
+    if not todo:
+        return
+
+    results_dir = os.path.dirname(args.results)
+    if results_dir:
+        os.makedirs(results_dir, exist_ok=True)
+
+    jobs = args.jobs or os.cpu_count() or 1
+    with open(args.results, "a") as out, \
+         cf.ProcessPoolExecutor(max_workers=jobs, mp_context=mp.get_context("spawn")) as pool:
+        futures = {pool.submit(_safe_run, p, args.snapshots): p for p in todo}
+        for i, fut in enumerate(cf.as_completed(futures), 1):
+            params = futures[fut]
+            rec = dict(key=run_key(params), params=params, **fut.result())
+            out.write(json.dumps(rec) + "\n")
+            out.flush()
+            status = "FAILED" if "error" in rec else f"drift {rec['energy_drift']:+.3e}  escapes {rec['escapes_end']}"
+            print(f"[{recorded + i}/{total}] G={params['G']} ts={params['time_scale']} "
+                  f"eps={params['softening']} seed={params['seed']}  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# headless.py
+"""
+Run the N-body engine without a window.
+
+    python headless.py --scenario plummer --n 5000 --steps 500 \\
+        --backend barnes_hut --integrator leapfrog --out runs/plummer
+
+Writes to --out:
+    diagnostics.csv         one row every --diag-every steps
+    snap_<step>.npz         pos / vel / mass / time every --snapshot-every steps
+    summary.json            settings and final numbers
+
+Nothing here imports pyray, so this runs on machines with no display
+and keeps start-up cheap enough for sweeps and tests.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+import numpy as np
+
+from scripts.state     import SimState
+from scripts.physics   import FORCE_BACKENDS, INTEGRATOR_NAMES, sim_step, active_backend
+from scripts.scenarios import SCENARIOS, build_scenario
+from scripts.diagnostics import measure
+
+DIAG_FIELDS = ["step", "time", "wall", "kinetic", "potential", "energy", "drift",
+               "momentum", "angular", "com_x", "com_y", "com_z"]
+
+
+def build_parser():
+    p = argparse.ArgumentParser(description="Headless N-body runner")
+    p.add_argument("--scenario",   default="default", choices=sorted(SCENARIOS))
+    p.add_argument("--n",          type=int,   default=None, help="body count (ignored by fixed scenarios)")
+    p.add_argument("--seed",       type=int,   default=0)
+    p.add_argument("--steps",      type=int,   default=1000)
+    p.add_argument("--dt",         type=float, default=1.0 / 480, help="sim time per step")
+    p.add_argument("--backend",    default="direct", choices=sorted(FORCE_BACKENDS))
+    p.add_argument("--integrator", default="symplectic_euler", choices=INTEGRATOR_NAMES)
+    p.add_argument("--G",          type=float, default=None, help="gravity constant (default: SimulationState's)")
+    p.add_argument("--softening",  type=float, default=None)
+    p.add_argument("--theta",      type=float, default=None)
+    p.add_argument("--pm-grid",    type=int,   default=None)
+    p.add_argument("--workers",    type=int,   default=None, help="direct_parallel processes, 0 = every core")
+    p.add_argument("--dtype",      default="float64", choices=["float32", "float64"])
+    p.add_argument("--diag-every",     type=int, default=10)
+    p.add_argument("--snapshot-every", type=int, default=0, help="0 = final snapshot only")
+    p.add_argument("--out",        default=None, help="output directory (nothing written if omitted)")
+    return p
+
+
+def make_state(args):
+    """SimState for the parsed args, built exactly as the interactive app would."""
+    state = SimState(args.scenario, args.n, args.seed, headless=True)
+    sim = state.sim
+    sim.force_backend = args.backend
+    sim.integrator    = args.integrator
+    for field, value in (("gravity_constant", args.G), ("softening", args.softening),
+                         ("theta", args.theta), ("pm_grid", args.pm_grid), ("workers", args.workers)):
+        if value is not None:
+            setattr(sim, field, value)
+    if args.G is not None or args.dtype != "float64":
+        # initial velocities depend on G, so rebuild with the requested one
+        state.bodies = build_scenario(args.scenario, args.n, args.seed,
+                                      sim.gravity_constant, np.dtype(args.dtype))
+    return state
+
+
+def diagnostics(bodies, sim, step, wall, e0=None):
+    """One diagnostics.csv row; drift is relative to energy e0 (the first row's)."""
+    q = measure(bodies, sim)
+    return dict(
+        step      = step,
+        time      = sim.simulation_time,
+        wall      = wall,
+        kinetic   = q["kinetic"],
+        potential = q["potential"],
+        energy    = q["energy"],
+        drift     = (q["energy"] - e0) / abs(e0) if e0 else 0.0,
+        momentum  = float(np.linalg.norm((q["px"], q["py"], q["pz"]))),
+        angular   = float(np.linalg.norm((q["lx"], q["ly"], q["lz"]))),
+        com_x     = q["com_x"],
+        com_y     = q["com_y"],
+        com_z     = q["com_z"],
+    )
+
+
+def save_snapshot(path, bodies, sim_time):
+    np.savez(path, pos=bodies.pos, vel=bodies.vel, mass=bodies.mass, radius=bodies.radius, time=sim_time)
+
+
+def run(args, on_diag=None, state=None):
+    """
+    Step the simulation args.steps times.
+    on_diag(row) is called for every diagnostics row; returns the final row.
+    Pass a state from make_state(args) to inspect it before / after.
+    """
+    state = state or make_state(args)
+    bodies, sim = state.bodies, state.sim
+
+    writer, diag_file = None, None
+    if args.out:
+        os.makedirs(args.out, exist_ok=True)
+        diag_file = open(os.path.join(args.out, "diagnostics.csv"), "w", newline="")
+        writer = csv.DictWriter(diag_file, fieldnames=DIAG_FIELDS)
+        writer.writeheader()
+
+    e0 = None
+
+    def record(step, wall):
+        nonlocal e0
+        row = diagnostics(bodies, sim, step, wall, e0)
+        e0  = row["energy"] if e0 is None else e0
+        if writer:
+            writer.writerow(row)
+        if on_diag:
+            on_diag(row)
+        return row
+
+    start = time.perf_counter()
+    row = record(0, 0.0)
+    try:
+        for step in range(1, args.steps + 1):
+            sim_step(bodies, args.dt, sim)
+            sim.simulation_time += args.dt
+
+            if args.diag_every and step % args.diag_every == 0:
+                row = record(step, time.perf_counter() - start)
+            if args.out and args.snapshot_every and step % args.snapshot_every == 0:
+                save_snapshot(os.path.join(args.out, f"snap_{step:08d}.npz"), bodies, sim.simulation_time)
+        if not args.diag_every or args.steps % args.diag_every:
+            row = record(args.steps, time.perf_counter() - start)
+    finally:
+        if diag_file:
+            diag_file.close()
+
+    if args.out:
+        save_snapshot(os.path.join(args.out, "snap_final.npz"), bodies, sim.simulation_time)
+        with open(os.path.join(args.out, "summary.json"), "w") as f:
+            json.dump(dict(args=vars(args), backend=active_backend(sim), n_bodies=len(bodies), final=row),
+                      f, indent=2)
+    return row
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    row = run(args)
+    print(f"{args.steps} steps, {row['wall']:.2f}s wall, "
+          f"{args.steps / max(row['wall'], 1e-9):.1f} steps/s, t = {row['time']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,58 +1,121 @@
 # main.py
+import math
+import sys
+import time
 import pyray as rl
-from utils.labels     import queue_label, flush_labels
+from utils.labels     import queue_label, queue_labels, flush_labels
 from utils.colors     import BACKGROUND
 from utils.hud        import draw_hud
 from scripts.state    import SimState
+from scripts.body     import follow_row
 from scripts.input    import handle_input
-from scripts.physics  import sim_step
+from scripts.sim_thread import PhysicsWorker
+from scripts.checkpoint import Autosaver, restore_checkpoint, wait_for_writes
+from scripts.profiler import profiler
 from scripts.render   import (draw_grid, draw_axes, draw_trails,
                               draw_gravity_lines, draw_bodies,
                               draw_force_vectors)
 #TODO: dynamic display system
 WINDOW_WIDTH      = 1280
 WINDOW_HEIGHT     = 720
-SUBSTEPS_PER_FRAME = 8
 
-rl.init_window(WINDOW_WIDTH, WINDOW_HEIGHT, "N-Body Gravity Simulator")
-rl.set_target_fps(60)
+# wall seconds between input polls on frames turbo doesn't draw
+TURBO_IDLE = 1.0 / 120
 
-state = SimState()
 
-while not rl.window_should_close():
-    state = handle_input(state)
+def main(argv=None):
+    """python main.py [checkpoint.npz] — resume from a checkpoint if given."""
+    argv = sys.argv[1:] if argv is None else argv
+    rl.init_window(WINDOW_WIDTH, WINDOW_HEIGHT, "N-Body Gravity Simulator")
+    rl.set_target_fps(60)
 
-    if not state.sim.is_paused:
-        real_dt    = rl.get_frame_time()
-        substep_dt = real_dt * state.sim.time_scale / SUBSTEPS_PER_FRAME
-        for _ in range(SUBSTEPS_PER_FRAME):
-            sim_step(state.bodies, substep_dt, state.sim.gravity_constant)
-        state.sim.simulation_time += real_dt * state.sim.time_scale
+    state  = SimState()
+    if argv:
+        restore_checkpoint(state, argv[0])
+    worker = PhysicsWorker(state)   # physics runs on its own thread from here on
+    worker.start()
+    autosaver = Autosaver()
 
-        if state.render.show_trails:
-            for body in state.bodies:
-                body.trail.append(body.position.copy())
+    last_draw = -math.inf
+    while not rl.window_should_close():
+        now = time.perf_counter()
+        if state.sim.is_turbo and now - last_draw < 1.0 / state.render.turbo_fps:
+            # fast-forward: leave the CPU to physics, only keep up with input
+            rl.poll_input_events()
+            with profiler.phase("handle_input"):
+                state = handle_input(state)
+            time.sleep(TURBO_IDLE)
+            continue
+        last_draw = now
+
+        with profiler.phase("sync"):
+            before = state.bodies
+            if state.player is not None:
+                # playback: frames straight from the recording, physics stays paused
+                state.player.advance(rl.get_frame_time())
+                state.player.sync(state)
+            else:
+                # positions interpolated between the worker's two newest snapshots
+                worker.sync(state, now)
+            if state.bodies is not before:
+                # rows move when bodies merge: stay on the same body, or whatever swallowed it
+                state.render.selected = follow_row(before, state.bodies, state.render.selected)
+        with profiler.phase("handle_input"):
+            state = handle_input(state)
+
+        state.render.selected %= len(state.bodies)
+        focus = [state.render.selected] if state.render.show_components else []
+        r = state.render
+        links = (r.link_mode, r.link_k, r.link_threshold, r.link_hz) if r.show_links else None
+        worker.set_view(r.show_vectors, focus, links)
+
+        if not state.sim.is_paused and state.render.show_trails:
+            with profiler.phase("push_trails"):
+                trails = state.bodies.trails
+                trails.configure(state.render.trail_length, state.render.trail_every)
+                trails.push(state.bodies.pos, state.render.trail_min_angle)
 
-    rl.begin_drawing()
-    rl.clear_background(BACKGROUND)
-    state.camera.set_target_body(state.bodies[0])
-    rl.begin_mode_3d(state.camera.get())
+        rl.begin_drawing()
+        rl.clear_background(BACKGROUND)
+        state.camera.set_target_body(state.bodies[state.render.selected])
+        rl.begin_mode_3d(state.camera.get())
+
+        #draw_grid()
+        #draw_axes(queue_label, state.camera.get())
+        if state.render.show_links:
+            r = state.render
+            with profiler.phase("draw_gravity_lines"):
+                draw_gravity_lines(state.bodies, r.link_mode, r.link_k, r.link_threshold,
+                                   r.link_hz, rl.get_time())
+        with profiler.phase("draw_bodies"):
+            draw_bodies(state.bodies, queue_labels, state.camera.get())
+
+        if state.render.show_trails:
+            with profiler.phase("draw_trails"):
+                draw_trails(state.bodies, state.render.trail_fade)
+        if state.render.show_vectors:
+            with profiler.phase("draw_force_vectors"):
+                draw_force_vectors(state.bodies, queue_labels, state.camera.get())
 
-    #draw_grid()
-    #draw_axes(queue_label, state.camera.get())
-    draw_gravity_lines(state.bodies)
-    draw_bodies(state.bodies, queue_label, state.camera.get())
+        rl.end_mode_3d()
 
-    if state.render.show_trails:
-        draw_trails(state.bodies)
-    if state.render.show_vectors:
-        draw_force_vectors(state.bodies, queue_label, state.camera.get())
+        with profiler.phase("flush_labels"):
+            flush_labels()
+        with profiler.phase("draw_hud"):
+            draw_hud(state, WINDOW_WIDTH, WINDOW_HEIGHT)
 
-    rl.end_mode_3d()
+        # raylib swaps buffers and waits out the target frame time in here
+        with profiler.phase("end_drawing"):
+            rl.end_drawing()
+        autosaver.maybe_save(state, now)
+        profiler.end_frame()
 
-    flush_labels()
-    draw_hud(state, WINDOW_WIDTH, WINDOW_HEIGHT)
+    worker.stop()
+    wait_for_writes()
+    rl.close_window()
 
-    rl.end_drawing()
 
-rl.close_window()
+# the guard matters: force-pool workers are spawned processes that
+# re-import this file, and must not open a window of their own
+if __name__ == "__main__":
+    main()
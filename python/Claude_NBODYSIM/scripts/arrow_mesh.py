@@ -0,0 +1,75 @@
+# scripts/arrow_mesh.py
+"""
+All force arrows drawn as one dynamic mesh.
+
+An arrow is a prism shaft plus a cone head. The template is built once
+per side count with x / y in world units and z as a fraction of the
+arrow's length, then every arrow is placed in numpy by its own
+(u, v, direction) frame — one draw call for the whole ArrowSet.
+"""
+import numpy as np
+from scripts.mesh_batch import MeshBatch
+
+SHAFT_RADIUS = 0.045
+HEAD_RADIUS  = 0.13
+HEAD_RATIO   = 0.22     # share of the length taken by the head
+
+# (max arrows, sides): big sets get thinner geometry
+ARROW_LODS = [(512, 8), (None, 3)]
+
+
+def arrow_template(sides, shaft_r=SHAFT_RADIUS, head_r=HEAD_RADIUS, head_ratio=HEAD_RATIO):
+    """(t, 3) triangle list, counter-clockwise from outside; z is a fraction of the length."""
+    a = np.arange(sides + 1) * (2 * np.pi / sides)
+    ring = np.stack((np.cos(a), np.sin(a)), axis=-1)
+    zs = 1.0 - head_ratio
+
+    def at(r, z):
+        return np.column_stack((ring * r, np.full(sides + 1, z)))
+
+    b, t, h = at(shaft_r, 0.0), at(shaft_r, zs), at(head_r, zs)
+    apex   = np.array([0.0, 0.0, 1.0])
+    centre = np.array([0.0, 0.0, zs])
+    tris = []
+    for k in range(sides):
+        tris += [(b[k], b[k + 1], t[k + 1]), (b[k], t[k + 1], t[k])]   # shaft side
+        tris += [(h[k], h[k + 1], apex)]                               # cone
+        tris += [(centre, h[k + 1], h[k])]                             # underside of the head
+    return np.array(tris, dtype=np.float32).reshape(-1, 3)
+
+
+class ArrowMesh:
+
+    def __init__(self):
+        self.batch     = MeshBatch()
+        self.templates = {}
+
+    def draw(self, arrows, palette):
+        """palette: (n + 1, 4) uint8 — body colours, then the resultant colour last."""
+        m = len(arrows)
+        if m == 0:
+            return
+        sides = next(s for limit, s in ARROW_LODS if limit is None or m <= limit)
+        if sides not in self.templates:
+            self.templates[sides] = arrow_template(sides)
+        template = self.templates[sides]
+        t = len(template)
+
+        # right-handed frame per arrow: u x v = w
+        w = arrows.direction
+        helper = np.where(np.abs(w[:, :1]) > 0.9, [[0, 1, 0]], [[1, 0, 0]]).astype(np.float32)
+        u = np.cross(w, helper)
+        u /= np.linalg.norm(u, axis=1, keepdims=True)
+        v = np.cross(w, u)
+        wl = w * arrows.length[:, None]
+
+        verts, cols = self.batch.reserve(m * t)
+        verts = verts.reshape(m, t, 3)
+        verts[:] = arrows.origin[:, None]
+        verts += template[None, :, 0, None] * u[:, None]
+        verts += template[None, :, 1, None] * v[:, None]
+        verts += template[None, :, 2, None] * wl[:, None]
+
+        # RESULTANT (-1) picks the last palette row
+        cols.reshape(m, t, 4)[:] = palette[arrows.color][:, None]
+        self.batch.draw(m * t)
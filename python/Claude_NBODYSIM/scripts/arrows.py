@@ -0,0 +1,83 @@
+# scripts/arrows.py
+"""
+Display-ready force arrows, built from arrays the physics already has.
+
+    arrows.origin     (m, 3) float32  base of the arrow, on the body's surface
+    arrows.direction  (m, 3) float32  unit vector
+    arrows.length     (m,)   float32  log1p(|F|) * ARROW_SCALE
+    arrows.color      (m,)   int32    index of the pulling body, RESULTANT for the net force
+    arrows.owner      (m,)   int32    body the arrow is drawn on
+
+The net force on every body is free: F = m * a from the last force
+evaluation, and by default that is all that gets built. The per-pair
+breakdown costs O(n) per body, so it is only made for the bodies in
+`focus` (the selected body): every contributor up to pairs_max bodies,
+its top_k strongest pulls beyond that.
+"""
+from dataclasses import dataclass
+import numpy as np
+
+# color index of the net-force arrow
+RESULTANT = -1
+
+# arrow length per log1p(|F|)
+ARROW_SCALE = 3.0
+
+
+@dataclass
+class ArrowSet:
+    origin    : np.ndarray
+    direction : np.ndarray
+    length    : np.ndarray
+    color     : np.ndarray
+    owner     : np.ndarray
+
+    def __len__(self):
+        return len(self.owner)
+
+
+def pair_forces(bodies, rows):
+    """(len(rows), n, 3) force on each row body from every body (zero from itself)."""
+    rows = np.asarray(rows)
+    d  = bodies.pos[None, :, :] - bodies.pos[rows, None, :]
+    r2 = np.einsum("ijk,ijk->ij", d, d) + bodies.softening ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # with zero softening the self pair is 0 / 0, overwritten just below
+        w = bodies.G * bodies.mass[rows, None] * bodies.mass[None, :] / (r2 * np.sqrt(r2))
+    w[np.arange(len(rows)), rows] = 0.0
+    return d * w[..., None]
+
+
+def build_arrows(bodies, focus=(), pairs_max=32, top_k=3):
+    """Arrows for the current body arrays (see module docstring)."""
+    n = len(bodies)
+    owners = [np.arange(n)]
+    forces = [bodies.acc * bodies.mass[:, None]]
+    colors = [np.full(n, RESULTANT)]
+
+    rows = np.array([i for i in focus if 0 <= i < n], dtype=np.int64)
+    k = min(n - 1 if n <= pairs_max else top_k, n - 1)
+    if k > 0 and len(rows):
+        f = pair_forces(bodies, rows)
+        mag = np.einsum("ijk,ijk->ij", f, f)
+        mag[np.arange(len(rows)), rows] = -1.0      # never pick the body itself
+        top = np.argpartition(-mag, k - 1, axis=1)[:, :k]
+        owners.append(np.repeat(rows, k))
+        forces.append(np.take_along_axis(f, top[..., None], axis=1).reshape(-1, 3))
+        colors.append(top.reshape(-1))
+
+    owner = np.concatenate(owners)
+    force = np.concatenate(forces)
+    color = np.concatenate(colors)
+
+    mag  = np.sqrt(np.einsum("ij,ij->i", force, force))
+    keep = mag > 1e-12
+    owner, force, color, mag = owner[keep], force[keep], color[keep], mag[keep]
+    direction = force / mag[:, None]
+    return ArrowSet(
+        origin    = (bodies.pos[owner] + direction * bodies.radius[owner, None]).astype(np.float32),
+        direction = direction.astype(np.float32),
+        length    = (np.log1p(mag) * ARROW_SCALE).astype(np.float32),
+        color     = color.astype(np.int32),
+        owner     = owner.astype(np.int32),
+    )
@@ -1,6 +1,9 @@
 # scripts/body.py
 
-from utils.colors import *
+import numpy as np
+from utils.palette import BODY_RGBA, TRAIL_RGBA
+from scripts.trails import TrailBuffer
+from scripts.arrows import pair_forces
 from utils.vector3D import Vector3D
 
 def default_bodies():
@@ -9,48 +12,242 @@ def default_bodies():
             position = Vector3D(25, 30, 100),
             velocity = Vector3D(0, 0, 0),
             mass = 1000, radius = 10,
-            color = BODY_COLS[0],
-            trail_color = TRAIL_COLS[0],
+            color = BODY_RGBA[0],
+            trail_color = TRAIL_RGBA[0],
         ),
 
         dict(
             position = Vector3D(80, -70, 60),
             velocity = Vector3D(0, 0, 0),
             mass = 2000, radius = 8,
-            color = BODY_COLS[1],
-            trail_color = TRAIL_COLS[1],
+            color = BODY_RGBA[1],
+            trail_color = TRAIL_RGBA[1],
         ),
 
         dict(
             position = Vector3D(0, 0, 0),
             velocity = Vector3D(0, 0, 0),
             mass = 3000, radius = 20,
-            color = BODY_COLS[2],
-            trail_color = TRAIL_COLS[2],
+            color = BODY_RGBA[2],
+            trail_color = TRAIL_RGBA[2],
         ),
     ]
 
-class Body:
+
+class BodyStore:
+    """
+    Struct-of-arrays container holding every body in the simulation.
+
+    Physics works directly on the contiguous arrays:
+        store.pos     (n, 3)  positions
+        store.vel     (n, 3)  velocities
+        store.acc     (n, 3)  accelerations from the last force evaluation
+        store.mass    (n,)
+        store.radius  (n,)
+        store.trails  TrailBuffer, fixed-size history of pos for drawing,
+                      only allocated the first time something asks for it
+
+    Everything else (render, hud, camera) can keep treating the store
+    as a list of Body objects — indexing or iterating hands out Body
+    views that read and write the arrays above.
+    """
+
     def __init__(
         self,
-        name,
-        position,
-        velocity,
-        mass,
-        radius,
-        color,
-        trail_color,
+        positions,
+        velocities,
+        masses,
+        radii,
+        names=None,
+        colors=None,
+        trail_colors=None,
+        dtype=np.float64,
     ):
-        self.name = name
-        self.position = position
-        self.velocity = velocity
-        self.mass = mass
-        self.radius = radius
-        self.forces = []
+        self.pos    = np.array(positions,  dtype=dtype).reshape(-1, 3)
+        self.vel    = np.array(velocities, dtype=dtype).reshape(-1, 3)
+        self.acc    = np.zeros_like(self.pos)
+        # True while acc still matches pos, lets integrators skip a force evaluation
+        self.acc_valid = False
+        self.force_key = None
+        # scratch space for integrators that keep history between steps
+        self.integrator_state = None
+        self.mass   = np.array(masses, dtype=dtype).reshape(-1)
+        self.radius = np.array(radii,  dtype=dtype).reshape(-1)
+
+        n = len(self.pos)
+        self.names        = list(names) if names is not None else [f"b{i+1}" for i in range(n)]
+        self.colors       = list(colors) if colors is not None else [BODY_RGBA[i % len(BODY_RGBA)] for i in range(n)]
+        self.trail_colors = list(trail_colors) if trail_colors is not None else [TRAIL_RGBA[i % len(TRAIL_RGBA)] for i in range(n)]
+        # (n, 300, 3) float32 is gigabytes at a million bodies, and headless
+        # runs, benchmarks and the physics worker's store never draw one
+        self._trails      = None
+        # stable per-body ids, so a compacted store can be matched to the old one,
+        # and for every id ever in the store the id of the body it merged into
+        self.ids          = np.arange(n)
+        self.merged_into  = np.arange(n)
+
+        # G / softening used by the last force evaluation,
+        # so per-pair breakdowns (Body.forces) can be rebuilt on demand
+        self.G         = 0.0
+        self.softening = 0.0
+        # ArrowSet from the last step that asked for one (physics.sim_step emit_arrows)
+        self.arrows    = None
+        # (m, 2) gravity-link pairs published by a PhysicsWorker, None = pick locally
+        self.links     = None
+
+    @classmethod
+    def from_dicts(cls, system, dtype=np.float64):
+        """Build a store from a list of body dicts (see default_bodies)."""
+        return cls(
+            positions    = [(b["position"].x, b["position"].y, b["position"].z) for b in system],
+            velocities   = [(b["velocity"].x, b["velocity"].y, b["velocity"].z) for b in system],
+            masses       = [b["mass"]   for b in system],
+            radii        = [b["radius"] for b in system],
+            colors       = [b["color"]  for b in system],
+            trail_colors = [b["trail_color"] for b in system],
+            dtype        = dtype,
+        )
+
+    @property
+    def dtype(self):
+        return self.pos.dtype
+
+    @property
+    def trails(self):
+        if self._trails is None:
+            self._trails = TrailBuffer(len(self))
+        return self._trails
+
+    @trails.setter
+    def trails(self, buffer):
+        # None drops the buffer; the next access starts an empty one
+        self._trails = buffer
+
+    @property
+    def has_trails(self):
+        return self._trails is not None
+
+    def keep(self, rows, into=None):
+        """
+        Keep only the bodies at these (sorted) rows, e.g. after mergers.
+        into: for every current row, the row of the body it merged into.
+        """
+        rows = np.asarray(rows)
+        if into is not None:
+            merged = self.merged_into.copy()    # published Layouts share the old one
+            merged[self.ids] = self.ids[np.asarray(into)]
+            self.merged_into = merged[merged]   # bodies that had merged into a merged body
+        self.pos, self.vel, self.acc = self.pos[rows], self.vel[rows], self.acc[rows]
+        self.mass, self.radius, self.ids = self.mass[rows], self.radius[rows], self.ids[rows]
+        self.names        = [self.names[i] for i in rows]
+        self.colors       = [self.colors[i] for i in rows]
+        self.trail_colors = [self.trail_colors[i] for i in rows]
+        if self._trails is not None:
+            self._trails.keep(rows)
+        # nothing computed for the old body set applies any more
+        self.acc_valid        = False
+        self.integrator_state = None
+        self.arrows           = None
+
+    # ---------------------------------------------- list-like access ---
+    def __len__(self):
+        return len(self.pos)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Body(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("body index out of range")
+        return Body(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Body(self, i)
+
+
+def follow_row(old, new, row):
+    """Row in `new` of the body at `row` in `old`, or of the body it merged into."""
+    if len(old) == 0 or len(new) == 0:
+        return 0
+    i = int(old.ids[row % len(old)])
+    if i < len(new.merged_into):
+        i = int(new.merged_into[i])
+    k = int(np.searchsorted(new.ids, i))
+    if k < len(new) and new.ids[k] == i:
+        return k
+    return row % len(new)
+
 
-        self.color = color
-        self.trail_color = trail_color
-        self.trail = []
+class Body:
+    """
+    Lightweight view onto one row of a BodyStore.
+
+    position / velocity come back as Vector3D copies, so
+        body.position += v
+    works (it writes back through the setter) but
+        body.position.x = 5
+    only changes the copy.
+    """
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def name(self):
+        return self.store.names[self.index]
+
+    @property
+    def position(self):
+        return Vector3D(*self.store.pos[self.index].tolist())
+
+    @position.setter
+    def position(self, v):
+        self.store.pos[self.index] = (v.x, v.y, v.z)
+        self.store.acc_valid = False
+
+    @property
+    def velocity(self):
+        return Vector3D(*self.store.vel[self.index].tolist())
+
+    @velocity.setter
+    def velocity(self, v):
+        self.store.vel[self.index] = (v.x, v.y, v.z)
+
+    @property
+    def mass(self):
+        return float(self.store.mass[self.index])
+
+    @property
+    def radius(self):
+        return float(self.store.radius[self.index])
+
+    @property
+    def color(self):
+        return self.store.colors[self.index]
+
+    @property
+    def trail_color(self):
+        return self.store.trail_colors[self.index]
+
+    @property
+    def trail(self):
+        """(count, 3) array of past positions, oldest first."""
+        return self.store.trails.ordered(self.index)
+
+    @property
+    def forces(self):
+        """
+        Per-pair (force_vec, other_body) breakdown for this body.
+        Only used for visualization, so it's rebuilt from the arrays
+        when asked for instead of being stored every substep.
+        """
+        s, i = self.store, self.index
+        # Newton's law: F = G * m1 * m2 / r^2, along the unit displacement
+        f  = pair_forces(s, [i])[0]
+        return [(Vector3D(*f[j].tolist()), Body(s, j)) for j in range(len(s)) if j != i]
 
     @property
     def direction(self):
@@ -58,7 +255,7 @@ class Body:
 
     @classmethod
     # create_all needs to build Body objects, so it can't be a regular instance method
-    def create_all(cls, system=None):
+    def create_all(cls, system=None, dtype=np.float64):
         if system is None:
             system = default_bodies()
-        return [cls(name=f"b{i+1}", **body_data) for i, body_data in enumerate(system)]
+        return BodyStore.from_dicts(system, dtype=dtype)
@@ -0,0 +1,124 @@
+# scripts/body_mesh.py
+"""
+Every body drawn in one batched mesh, with level of detail.
+
+Each frame the bodies are culled against the view frustum, then each
+visible body gets the cheapest shape that still looks right at its
+projected size:
+
+    >= 24 px radius    16 x 24 sphere
+    >=  6 px           8 x 12 sphere
+    >=  2 px           camera-facing octagon
+    smaller            camera-facing quad, never below MIN_PIXELS
+
+Bodies are drawn unlit, so below a few pixels a flat disc facing the
+camera is indistinguishable from a sphere at a fraction of the vertices.
+The shapes are unit templates scaled and moved into place in numpy and
+submitted through one MeshBatch — one draw call for all bodies.
+"""
+import math
+import numpy as np
+from scripts.mesh_batch import MeshBatch
+from scripts.view import camera_basis
+
+# (minimum projected radius in pixels, rings, slices), finest first
+SPHERE_LODS = [(24.0, 16, 24), (6.0, 8, 12)]
+
+# (minimum projected radius in pixels, polygon sides) for camera-facing discs
+DISC_LODS = [(2.0, 8), (0.0, 4)]
+
+# sub-pixel bodies are still drawn with this radius in pixels
+MIN_PIXELS = 0.75
+
+
+def sphere_template(rings, slices):
+    """Unit UV sphere as a (t, 3) triangle list, wound outwards."""
+    theta = np.linspace(0.0, math.pi, rings + 1)
+    phi   = np.linspace(0.0, 2 * math.pi, slices + 1)
+    th, ph = np.meshgrid(theta, phi, indexing="ij")
+    grid = np.stack((np.sin(th) * np.cos(ph), np.cos(th), np.sin(th) * np.sin(ph)), axis=-1)
+
+    a, b = grid[:-1, :-1], grid[1:, :-1]
+    c, d = grid[1:, 1:],   grid[:-1, 1:]
+    tris = np.concatenate((np.stack((a, b, c), axis=-2).reshape(-1, 3, 3),
+                           np.stack((a, c, d), axis=-2).reshape(-1, 3, 3)))
+
+    normal  = np.cross(tris[:, 1] - tris[:, 0], tris[:, 2] - tris[:, 0])
+    outward = np.einsum("ij,ij->i", normal, tris.sum(axis=1))
+    tris = tris[np.abs(outward) > 1e-9]          # pole triangles collapse to lines
+    flip = outward[np.abs(outward) > 1e-9] < 0
+    tris[flip] = tris[flip][:, ::-1]
+    return tris.reshape(-1, 3).astype(np.float32)
+
+
+def disc_template(sides):
+    """Unit polygon in the (right, up) plane as a (t, 2) fan, counter-clockwise."""
+    a = math.pi / sides + np.arange(sides + 1) * (2 * math.pi / sides)
+    rim = np.stack((np.cos(a), np.sin(a)), axis=-1) / math.cos(math.pi / sides)
+    centre = np.zeros((sides, 2))
+    return np.stack((centre, rim[:-1], rim[1:]), axis=1).reshape(-1, 2).astype(np.float32)
+
+
+class BodyMesh:
+
+    def __init__(self):
+        self.batch   = MeshBatch()
+        self.spheres = [(px, sphere_template(r, s)) for px, r, s in SPHERE_LODS]
+        self.discs   = [(px, disc_template(sides)) for px, sides in DISC_LODS]
+
+    def draw(self, pos, radius, colors, camera, screen_w, screen_h):
+        """
+        Cull, pick LODs and draw. camera is an rl.Camera3D.
+        Returns (visible body indices, their projected radius in pixels).
+        """
+        eye, fwd, right, up = camera_basis(camera)
+
+        half_v = math.radians(camera.fovy) / 2
+        half_h = math.atan(math.tan(half_v) * screen_w / screen_h)
+
+        d     = pos - eye
+        depth = d @ fwd
+        side  = d @ right
+        high  = d @ up
+        r     = radius
+        # sphere vs the four side planes through the eye, plus "not behind us"
+        inside = (
+            (depth > -r) &
+            (np.abs(side) * math.cos(half_h) - depth * math.sin(half_h) < r) &
+            (np.abs(high) * math.cos(half_v) - depth * math.sin(half_v) < r)
+        )
+        vis = np.flatnonzero(inside)
+        if len(vis) == 0:
+            return vis, np.zeros(0)
+
+        px_per_unit = (screen_h / 2) / (np.maximum(depth[vis], 1e-6) * math.tan(half_v))
+        r_px = radius[vis] * px_per_unit
+
+        groups, lower = [], math.inf
+        for px, template in self.spheres:
+            groups.append((vis[(r_px >= px) & (r_px < lower)], template, None))
+            lower = px
+        for px, flat in self.discs:
+            sel = (r_px >= px) & (r_px < lower)
+            # discs face the camera; sub-pixel ones are grown to stay visible
+            template = (flat[:, 0, None] * right + flat[:, 1, None] * up).astype(np.float32)
+            groups.append((vis[sel], template, np.maximum(r_px[sel], MIN_PIXELS) / px_per_unit[sel]))
+            lower = px
+
+        total = sum(len(idx) * len(t) for idx, t, _ in groups)
+        verts, cols = self.batch.reserve(total)
+        at = 0
+        for idx, template, scale in groups:
+            k, t = len(idx), len(template)
+            if k == 0:
+                continue
+            s = (radius[idx] if scale is None else scale).astype(np.float32)
+            v = verts[at:at + k * t].reshape(k, t, 3)
+            # in float32 and in place — this is most of the per-frame cost
+            np.multiply(template[None], s[:, None, None], out=v)
+            v += pos[idx].astype(np.float32)[:, None]
+            cols[at:at + k * t].reshape(k, t, 4)[:] = colors[idx][:, None]
+            at += k * t
+
+        self.batch.draw(total)
+        return vis, r_px
@@ -0,0 +1,196 @@
+# scripts/checkpoint.py
+"""
+Save and resume the whole simulation as one uncompressed .npz file.
+
+    pos vel mass radius     body arrays, in the simulation's dtype
+    names                   (n,) str
+    colors trail_colors     (n, 4) uint8
+    trail_*                 TrailBuffer points / head / count / ticks / every
+    camera                  (20,) float64: target xyz, orbit_dist, rotation m0..m15
+    sim                     SimulationState as JSON
+    scenario                (scenario, n_bodies, seed) as JSON, for reset
+
+capture() gathers these on the frame loop without copying anything big:
+with a PhysicsWorker the body arrays come from its newest Snapshot,
+which is already an immutable copy. Only the trails are live render
+state, and autosaves skip them past AUTOSAVE_TRAIL_BYTES rather than
+copy them mid-frame. names and colours stay the worker Layout's tuples
+until write_checkpoint() turns them into arrays on the writer thread,
+once per body set (tens of ms at 50k bodies). save_in_background()
+then writes on a background thread, to a temporary file renamed over
+the old one, so a crash mid-write never leaves a broken checkpoint
+behind.
+"""
+import json
+import os
+import threading
+import zipfile
+from dataclasses import asdict, fields
+import numpy as np
+
+from scripts.body   import BodyStore
+from scripts.trails import TrailBuffer
+
+CHECKPOINT_VERSION = 1
+
+CHECKPOINT_DIR = "checkpoints"
+QUICK_SAVE     = os.path.join(CHECKPOINT_DIR, "quick.npz")
+AUTOSAVE       = os.path.join(CHECKPOINT_DIR, "autosave.npz")
+
+# wall seconds between autosaves
+AUTOSAVE_SECONDS = 60.0
+
+# trail buffers larger than this are left out of autosaves
+AUTOSAVE_TRAIL_BYTES = 16 << 20
+
+# what load_checkpoint() raises for a missing, truncated, corrupt or foreign file
+LOAD_ERRORS = (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile)
+
+
+def capture(state, trails=True):
+    """Everything a checkpoint holds (see module docstring); names and colours still as tuples."""
+    worker = getattr(state, "worker", None)
+    if worker is not None:
+        snap = worker.latest()[1]
+        lay = snap.layout
+        names, colors, trail_colors = lay.names, lay.colors, lay.trail_colors
+        arrays = dict(pos=snap.pos, vel=snap.vel, mass=snap.mass, radius=snap.radius)
+        sim = snap.sim
+    else:
+        b = state.bodies
+        names, colors, trail_colors = tuple(b.names), tuple(b.colors), tuple(b.trail_colors)
+        arrays = dict(pos=b.pos.copy(), vel=b.vel.copy(), mass=b.mass.copy(), radius=b.radius.copy())
+        sim = state.sim
+
+    arrays.update(
+        version      = np.int64(CHECKPOINT_VERSION),
+        names        = names,          # tuples, converted by write_checkpoint()
+        colors       = colors,
+        trail_colors = trail_colors,
+        sim          = np.array(json.dumps(asdict(sim))),
+        scenario     = np.array(json.dumps(list(state.scenario))),
+    )
+
+    t = state.bodies.trails if state.bodies.has_trails else None
+    if t is not None and (trails is True or (trails == "auto" and t.points.nbytes <= AUTOSAVE_TRAIL_BYTES)):
+        if len(t) == len(arrays["pos"]):
+            arrays.update(trail_points=t.points.copy(), trail_head=t.head.copy(),
+                          trail_count=t.count.copy(), trail_state=np.array([t.ticks, t.every]))
+
+    cam = state.camera
+    if cam is not None:
+        rot = [getattr(cam.camera_rotation, f"m{i}") for i in range(16)]
+        arrays["camera"] = np.array([cam.target.x, cam.target.y, cam.target.z, cam.orbit_dist, *rot])
+    return arrays
+
+
+# the last body set's name / colour tuples and their arrays
+_static = ((), {})
+
+def _static_arrays(names, colors, trail_colors):
+    """names / colors / trail_colors as arrays, reused while the tuples are the same objects."""
+    global _static
+    key, arrays = _static
+    if len(key) != 3 or any(a is not b for a, b in zip(key, (names, colors, trail_colors))):
+        arrays = dict(
+            names        = np.array(names, dtype=str),
+            colors       = np.array(colors, dtype=np.uint8).reshape(-1, 4),
+            trail_colors = np.array(trail_colors, dtype=np.uint8).reshape(-1, 4),
+        )
+        _static = ((names, colors, trail_colors), arrays)
+    return arrays
+
+
+def write_checkpoint(path, arrays):
+    if isinstance(arrays["names"], tuple):
+        arrays = dict(arrays, **_static_arrays(arrays["names"], arrays["colors"], arrays["trail_colors"]))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+def save_checkpoint(path, state):
+    """Capture and write on the calling thread."""
+    write_checkpoint(path, capture(state))
+
+
+def load_checkpoint(path):
+    """(bodies, sim, scenario, camera array or None) from a checkpoint file."""
+    from scripts.state import SimulationState
+
+    with np.load(path) as f:
+        data = {k: f[k] for k in f.files}
+    if int(data["version"]) != CHECKPOINT_VERSION:
+        raise ValueError(f"{path}: checkpoint version {int(data['version'])}, expected {CHECKPOINT_VERSION}")
+
+    bodies = BodyStore(data["pos"], data["vel"], data["mass"], data["radius"],
+                       data["names"].tolist(),
+                       [tuple(c) for c in data["colors"].tolist()],
+                       [tuple(c) for c in data["trail_colors"].tolist()],
+                       dtype=data["pos"].dtype)
+    if "trail_points" in data:
+        ticks, every = data["trail_state"].tolist()
+        points = data["trail_points"]
+        trails = TrailBuffer(len(bodies), points.shape[1], every)
+        trails.points[:] = points
+        trails.head[:], trails.count[:], trails.ticks = data["trail_head"], data["trail_count"], ticks
+        bodies.trails = trails
+
+    # unknown keys from other versions of SimulationState are ignored
+    known = {f.name for f in fields(SimulationState)}
+    sim = SimulationState(**{k: v for k, v in json.loads(str(data["sim"])).items() if k in known})
+    scenario = tuple(json.loads(str(data["scenario"])))
+    return bodies, sim, scenario, data.get("camera")
+
+
+def restore_checkpoint(state, path):
+    """Load path into state — through the physics worker if one is attached."""
+    bodies, sim, scenario, camera = load_checkpoint(path)
+    state.scenario = scenario
+    state.send(("restore", bodies, sim, scenario))
+    if camera is not None and state.camera is not None:
+        cam = state.camera
+        cam.target.x, cam.target.y, cam.target.z = camera[:3].tolist()
+        cam.orbit_dist = float(camera[3])
+        for i, m in enumerate(camera[4:].tolist()):
+            setattr(cam.camera_rotation, f"m{i}", m)
+
+
+# the background write in progress, if any
+_writer = None
+
+def save_in_background(state, path, trails=True):
+    """Capture now, write on a background thread. False if a write is still running."""
+    global _writer
+    if _writer is not None and _writer.is_alive():
+        return False
+    arrays  = capture(state, trails)
+    _writer = threading.Thread(target=write_checkpoint, args=(path, arrays), name="checkpoint", daemon=True)
+    _writer.start()
+    return True
+
+def wait_for_writes():
+    if _writer is not None:
+        _writer.join()
+
+
+class Autosaver:
+    """Starts a background checkpoint write every `every` wall seconds."""
+
+    def __init__(self, path=AUTOSAVE, every=AUTOSAVE_SECONDS):
+        self.path  = path
+        self.every = every
+        self.last  = None
+
+    def maybe_save(self, state, now):
+        """Call once per frame; True when a write was started."""
+        if self.last is None:
+            self.last = now
+        if self.every <= 0 or now - self.last < self.every:
+            return False
+        if not save_in_background(state, self.path, trails="auto"):
+            return False    # previous write still going, try again next frame
+        self.last = now
+        return True
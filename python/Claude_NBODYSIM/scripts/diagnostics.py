@@ -0,0 +1,133 @@
+# scripts/diagnostics.py
+"""
+Conserved quantities, for judging integrators and force backends.
+
+measure() computes, in float64:
+
+    kinetic     0.5 * sum m v^2
+    potential   0.5 * sum m phi, from the same approximation the active
+                force backend uses — an octree walk for barnes_hut, the
+                mesh for particle_mesh, direct summation otherwise (and
+                under hermite_block, which always sums directly) — so
+                it costs about one force evaluation
+    energy      kinetic + potential
+    p           total momentum                     sum m v
+    L           total angular momentum (origin)    sum m (x cross v)
+    com         centre of mass
+
+Diagnostics samples measure() every `every` steps into a fixed-size
+ring buffer (the HUD sparkline reads it) and writes it out as CSV.
+drift is (energy - e0) / |e0|, with e0 the first sample of the current
+body set and force law: mergers change the set (and the energy), and a
+new backend, theta, mesh, softening or G changes the potential estimate,
+so either restarts it.
+"""
+import csv
+import os
+import threading
+import time
+import numpy as np
+
+from scripts.octree        import Octree
+from scripts.particle_mesh import pm_potentials
+from scripts.physics       import pairwise_potentials, force_key, active_backend
+
+FIELDS = ["step", "time", "kinetic", "potential", "energy", "drift",
+          "px", "py", "pz", "lx", "ly", "lz", "com_x", "com_y", "com_z"]
+
+# samples kept in the ring buffer
+HISTORY = 1024
+
+# steps between samples
+DIAG_EVERY = 50
+
+EXPORT_DIR = "diagnostics"
+
+
+def new_export_path():
+    return os.path.join(EXPORT_DIR, time.strftime("diag_%Y%m%d_%H%M%S.csv"))
+
+
+def potentials(bodies, sim):
+    """phi at every body with the active backend's approximation (float64)."""
+    G, eps = sim.gravity_constant, sim.softening
+    if len(bodies) == 0:
+        return np.zeros(0)
+    backend = active_backend(sim)
+    if backend == "barnes_hut":
+        return Octree(bodies.pos, bodies.mass).potentials(G, sim.theta, eps)
+    if backend == "particle_mesh":
+        return pm_potentials(bodies.pos, bodies.mass, G, sim.pm_grid, eps)
+    return pairwise_potentials(bodies.pos, bodies.mass, G, eps)
+
+
+def measure(bodies, sim, potential=True):
+    """Conserved quantities of bodies as a dict (potential=False skips the O(force) part)."""
+    m = bodies.mass.astype(np.float64)
+    x = bodies.pos.astype(np.float64)
+    v = bodies.vel.astype(np.float64)
+    mv = m[:, None] * v
+    p  = mv.sum(axis=0)
+    L  = np.cross(x, mv).sum(axis=0)
+    mt = m.sum()
+    com = (m[:, None] * x).sum(axis=0) / mt if mt else np.zeros(3)
+    ke = 0.5 * float(np.einsum("ij,ij->", mv, v))
+    pe = 0.5 * float(m @ potentials(bodies, sim)) if potential else float("nan")
+    return dict(kinetic=ke, potential=pe, energy=ke + pe,
+                px=p[0], py=p[1], pz=p[2], lx=L[0], ly=L[1], lz=L[2],
+                com_x=com[0], com_y=com[1], com_z=com[2])
+
+
+class Diagnostics:
+    """measure() every `every` steps into a ring buffer of `history` samples."""
+
+    def __init__(self, every=DIAG_EVERY, history=HISTORY):
+        self.every   = max(1, int(every))
+        self.data    = np.full((history, len(FIELDS)), np.nan)
+        self._lock   = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.head  = 0
+            self.count = 0
+        self.e0  = None
+        self.key = None
+
+    def on_step(self, bodies, sim, step):
+        """Call after every physics step; samples one step in `every`."""
+        if step % self.every == 0:
+            self.sample(bodies, sim, step)
+
+    def sample(self, bodies, sim, step):
+        row = measure(bodies, sim)
+        key = (len(bodies), force_key(sim))
+        if self.key != key:
+            self.e0, self.key = row["energy"], key
+        row.update(step=step, time=sim.simulation_time,
+                   drift=(row["energy"] - self.e0) / abs(self.e0) if self.e0 else 0.0)
+        with self._lock:
+            self.data[self.head] = [row[f] for f in FIELDS]
+            self.head  = (self.head + 1) % len(self.data)
+            self.count = min(self.count + 1, len(self.data))
+        return row
+
+    def series(self, field=None):
+        """Samples oldest first — every field as (m, len(FIELDS)), or one column."""
+        with self._lock:
+            rows = np.roll(self.data, -self.head, axis=0)[len(self.data) - self.count:]
+        return rows if field is None else rows[:, FIELDS.index(field)]
+
+    def latest(self):
+        """The newest sample as a dict, or None before the first."""
+        rows = self.series()
+        return dict(zip(FIELDS, rows[-1].tolist())) if len(rows) else None
+
+    def export_csv(self, path):
+        rows = self.series()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            writer.writerows(rows.tolist())
+        return len(rows)
@@ -1,6 +1,16 @@
 # scripts/input.py
 
 import pyray as rl
+from scripts.physics import FORCE_BACKENDS, INTEGRATOR_NAMES
+from scripts.links import LINK_MODES
+from utils.hud import HUD_METRICS
+from scripts.checkpoint import QUICK_SAVE, LOAD_ERRORS, save_in_background, restore_checkpoint
+from scripts.recorder import Player, TrajectoryReader, latest_recording, new_recording_path
+from scripts.diagnostics import new_export_path
+from scripts.profiler import profiler
+
+def shift_held():
+    return rl.is_key_down(rl.KEY_LEFT_SHIFT) or rl.is_key_down(rl.KEY_RIGHT_SHIFT)
 
 def handle_input(state):
 
@@ -21,37 +31,149 @@ def handle_input(state):
     state.camera.update()
     state.input.previous_mouse = current_mouse
 
-    if rl.is_key_pressed(rl.KEY_SPACE):
-        state.sim.is_paused = not state.sim.is_paused
+    if rl.is_key_pressed(rl.KEY_F7):
+        toggle_playback(state)
 
-    if rl.is_key_pressed(rl.KEY_R):
-        state.reset()
+    if state.player is not None:
+        playback_keys(state)
+    else:
+        simulation_keys(state)
 
     if rl.is_key_pressed(rl.KEY_T):
         state.render.show_trails = not state.render.show_trails
         if not state.render.show_trails:
-            for body in state.bodies:
-                body.trail.clear()
+            state.bodies.trails = None    # free it, a new one starts when trails come back
 
     if rl.is_key_pressed(rl.KEY_V):
         state.render.show_vectors = not state.render.show_vectors
 
+    if rl.is_key_pressed(rl.KEY_L):
+        if shift_held():
+            i = LINK_MODES.index(state.render.link_mode)
+            state.render.link_mode = LINK_MODES[(i + 1) % len(LINK_MODES)]
+        else:
+            state.render.show_links = not state.render.show_links
+
     if rl.is_key_pressed(rl.KEY_C):
         state.render.show_components = not state.render.show_components
 
+    if rl.is_key_pressed(rl.KEY_TAB):
+        step = -1 if shift_held() else 1
+        state.render.selected = (state.render.selected + step) % len(state.bodies)
+
+    if rl.is_key_pressed(rl.KEY_PAGE_DOWN):
+        state.render.hud_page += 1
+    if rl.is_key_pressed(rl.KEY_PAGE_UP):
+        state.render.hud_page = max(0, state.render.hud_page - 1)
+
+    if rl.is_key_pressed(rl.KEY_M):
+        i = HUD_METRICS.index(state.render.hud_metric)
+        state.render.hud_metric = HUD_METRICS[(i + 1) % len(HUD_METRICS)]
+        state.render.hud_page = 0
+
+    # P profiler overlay, shift+P trace the next TRACE_FRAMES frames
+    if rl.is_key_pressed(rl.KEY_P):
+        if shift_held():
+            if not profiler.tracing:
+                profiler.trace()
+        else:
+            profiler.toggle()
+
+    return state
+
+
+def simulation_keys(state):
+    # simulation changes are sent as commands (SimState.apply), so they
+    # reach the physics worker between steps rather than mid-step
+    if rl.is_key_pressed(rl.KEY_SPACE):
+        state.send(("set", "is_paused", not state.sim.is_paused))
+
+    if rl.is_key_pressed(rl.KEY_F):
+        state.send(("set", "is_turbo", not state.sim.is_turbo))
+
+    if rl.is_key_pressed(rl.KEY_R):
+        state.send(("reset",))
+
+    if rl.is_key_pressed(rl.KEY_F5):
+        save_in_background(state, QUICK_SAVE)
+    if rl.is_key_pressed(rl.KEY_F9):
+        try:
+            restore_checkpoint(state, QUICK_SAVE)
+        except FileNotFoundError:
+            state.notify("no quick save yet (F5)")
+        except LOAD_ERRORS as e:
+            # a truncated / corrupt / old-version file must not take the app down
+            state.notify(f"quick load failed: {type(e).__name__}: {e}")
+
+    if rl.is_key_pressed(rl.KEY_E) and state.worker is not None:
+        state.worker.diagnostics.export_csv(new_export_path())
+
+    if rl.is_key_pressed(rl.KEY_X):
+        state.send(("set", "merge_collisions", not state.sim.merge_collisions))
+
+    if rl.is_key_pressed(rl.KEY_F6):
+        recording = state.worker is not None and state.worker.recorder is not None
+        state.send(("record", None if recording else new_recording_path()))
+
     if rl.is_key_pressed(rl.KEY_EQUAL):
-        state.sim.time_scale = min(8.0, state.sim.time_scale * 1.25)
+        state.send(("set", "time_scale", min(8.0, state.sim.time_scale * 1.25)))
     if rl.is_key_pressed(rl.KEY_MINUS):
-        state.sim.time_scale = max(0.05, state.sim.time_scale / 1.25)
+        state.send(("set", "time_scale", max(0.05, state.sim.time_scale / 1.25)))
+
+    if rl.is_key_pressed(rl.KEY_B):
+        backends = list(FORCE_BACKENDS)
+        i = backends.index(state.sim.force_backend)
+        state.send(("set", "force_backend", backends[(i + 1) % len(backends)]))
+
+    if rl.is_key_pressed(rl.KEY_I):
+        i = INTEGRATOR_NAMES.index(state.sim.integrator)
+        state.send(("set", "integrator", INTEGRATOR_NAMES[(i + 1) % len(INTEGRATOR_NAMES)]))
+
+    if rl.is_key_pressed(rl.KEY_RIGHT_BRACKET):
+        state.send(("set", "theta", min(1.5, state.sim.theta + 0.1)))
+    if rl.is_key_pressed(rl.KEY_LEFT_BRACKET):
+        state.send(("set", "theta", max(0.0, state.sim.theta - 0.1)))
 
     if rl.is_key_pressed(rl.KEY_G):
-        shift_held = (
-            rl.is_key_down(rl.KEY_LEFT_SHIFT) or
-            rl.is_key_down(rl.KEY_RIGHT_SHIFT)
-        )
-        if shift_held:
-            state.sim.gravity_constant = max(0.1,  state.sim.gravity_constant - 0.25)
+        if shift_held():
+            state.send(("set", "gravity_constant", max(0.1,  state.sim.gravity_constant - 0.25)))
         else:
-            state.sim.gravity_constant = min(20.0, state.sim.gravity_constant + 0.25)
+            state.send(("set", "gravity_constant", min(20.0, state.sim.gravity_constant + 0.25)))
 
-    return state
+
+def toggle_playback(state):
+    """F7: play the latest recording back, or return to the live simulation."""
+    if state.player is not None:
+        state.player = None
+        return
+    path = latest_recording()
+    if path is None:
+        return
+    reader = TrajectoryReader(path)
+    if len(reader) == 0:
+        return
+    # stop recording and stepping — playback never runs physics
+    state.send(("record", None))
+    state.send(("set", "is_paused", True))
+    state.player = Player(reader)
+
+
+def playback_keys(state):
+    player = state.player
+    # LEFT / RIGHT jump 1% of the recording, 10% with shift
+    jump = (0.1 if shift_held() else 0.01) * (player.end - player.start)
+
+    if rl.is_key_pressed(rl.KEY_SPACE):
+        player.paused = not player.paused
+    if rl.is_key_pressed(rl.KEY_RIGHT):
+        player.seek(player.t + jump)
+    if rl.is_key_pressed(rl.KEY_LEFT):
+        player.seek(player.t - jump)
+    if rl.is_key_pressed(rl.KEY_HOME):
+        player.seek(player.start)
+    if rl.is_key_pressed(rl.KEY_END):
+        player.seek(player.end)
+    if rl.is_key_pressed(rl.KEY_EQUAL):
+        player.rate = min(1000.0, player.rate * 1.25)
+    if rl.is_key_pressed(rl.KEY_MINUS):
+        player.rate = max(0.05, player.rate / 1.25)
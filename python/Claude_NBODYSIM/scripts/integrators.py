@@ -0,0 +1,98 @@
+# scripts/integrators.py
+"""
+Time integrators for the batched body arrays.
+
+Every integrator has the signature
+    integrator(bodies, dt, accel)
+where bodies is a BodyStore and accel(pos) returns the (n, 3)
+accelerations for a set of positions (whatever force backend is active).
+
+Schemes that finish on a force evaluation at the new positions leave it
+in bodies.acc with bodies.acc_valid = True, so the next step can start
+from it instead of evaluating again ("first same as last").
+
+    scheme             order   force evals / step
+    symplectic_euler     1        1
+    leapfrog (KDK)       2        1
+    velocity_verlet      2        1
+    rk4                  4        4
+    yoshida4             4        3
+"""
+
+# Yoshida (1990) 4th-order composition weights
+_CBRT2 = 2.0 ** (1.0 / 3.0)
+_W1 = 1.0 / (2.0 - _CBRT2)
+_W0 = -_CBRT2 / (2.0 - _CBRT2)
+
+
+def _start_acc(bodies, accel):
+    """Acceleration at the current positions, reusing the last step's if still valid."""
+    if not bodies.acc_valid:
+        bodies.acc[:] = accel(bodies.pos)
+    return bodies.acc
+
+
+def _finish(bodies, acc):
+    bodies.acc[:] = acc
+    bodies.acc_valid = True
+
+
+def symplectic_euler(bodies, dt, accel):
+    # update velocity, then position
+    bodies.vel += _start_acc(bodies, accel) * dt
+    bodies.pos += bodies.vel * dt
+    bodies.acc_valid = False
+
+
+def leapfrog(bodies, dt, accel):
+    # kick - drift - kick
+    bodies.vel += 0.5 * dt * _start_acc(bodies, accel)
+    bodies.pos += dt * bodies.vel
+    acc = accel(bodies.pos)
+    bodies.vel += 0.5 * dt * acc
+    _finish(bodies, acc)
+
+
+def velocity_verlet(bodies, dt, accel):
+    acc0 = _start_acc(bodies, accel).copy()
+    bodies.pos += dt * bodies.vel + (0.5 * dt * dt) * acc0
+    acc1 = accel(bodies.pos)
+    bodies.vel += (0.5 * dt) * (acc0 + acc1)
+    _finish(bodies, acc1)
+
+
+def rk4(bodies, dt, accel):
+    x0, v0 = bodies.pos.copy(), bodies.vel.copy()
+
+    k1x, k1v = v0,                   _start_acc(bodies, accel).copy()
+    k2x, k2v = v0 + 0.5 * dt * k1v,  accel(x0 + 0.5 * dt * k1x)
+    k3x, k3v = v0 + 0.5 * dt * k2v,  accel(x0 + 0.5 * dt * k2x)
+    k4x, k4v = v0 + dt * k3v,        accel(x0 + dt * k3x)
+
+    bodies.pos[:] = x0 + (dt / 6.0) * (k1x + 2.0 * k2x + 2.0 * k3x + k4x)
+    bodies.vel[:] = v0 + (dt / 6.0) * (k1v + 2.0 * k2v + 2.0 * k3v + k4v)
+    bodies.acc[:] = k1v
+    bodies.acc_valid = False
+
+
+def yoshida4(bodies, dt, accel):
+    # three leapfrog sub-steps with weights w1, w0, w1 — the end-of-substep
+    # force is reused as the start of the next, so only 3 evaluations
+    acc = _start_acc(bodies, accel).copy()
+    for w in (_W1, _W0, _W1):
+        h = w * dt
+        bodies.vel += 0.5 * h * acc
+        bodies.pos += h * bodies.vel
+        acc = accel(bodies.pos)
+        bodies.vel += 0.5 * h * acc
+    _finish(bodies, acc)
+
+
+# name -> integrator, SimulationState.integrator picks one of these
+INTEGRATORS = {
+    "symplectic_euler" : symplectic_euler,
+    "leapfrog"         : leapfrog,
+    "velocity_verlet"  : velocity_verlet,
+    "rk4"              : rk4,
+    "yoshida4"         : yoshida4,
+}
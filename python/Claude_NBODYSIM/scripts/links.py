@@ -0,0 +1,160 @@
+# scripts/links.py
+"""
+Which gravity links the overlay draws.
+
+Instead of a line between every pair, each body keeps only
+
+    "strongest"   its k pairs with the largest |F| = G m_i m_j / (r^2 + eps^2)
+    "nearest"     its k closest bodies
+    "threshold"   every pair with |F| >= threshold
+
+Small systems are searched exhaustively. Larger ones score the pairs
+in the same or adjacent cells of a SpatialGrid sized to the typical
+spacing between bodies, plus every body paired with the FAR_MASSIVE
+most massive ones — a central star is the strongest pull on most of a
+disk however far away it sits. Threshold mode widens that heavy set
+until no pair left out (both bodies lighter, at least a cell apart)
+could reach the threshold, up to FAR_MAX bodies.
+
+The pair list is rebuilt at refresh_hz; in between the same pairs are
+drawn at the bodies' current positions. A pick costs a few hundred ms
+at 50k bodies, so GravityLinks also holds picks back to LINK_BUDGET of
+wall time, and the PhysicsWorker runs it on its own thread and
+publishes the pairs with each Snapshot — the frame loop never picks
+unless it is playing a recording back.
+"""
+import time
+import numpy as np
+from scripts.spatial_grid import SpatialGrid
+
+LINK_MODES = ["strongest", "nearest", "threshold"]
+
+# up to this many bodies every pair is a candidate
+EXHAUSTIVE_MAX = 64
+
+# grid cell, in multiples of the typical spacing between bodies
+CELL_SPACINGS = 1.0
+
+# the most massive bodies are candidates for every body, however far
+FAR_MASSIVE = 8
+
+# threshold mode may widen that to at most this many
+FAR_MAX = 64
+
+# share of wall time link picking may take, whatever refresh_hz asks for
+LINK_BUDGET = 0.1
+
+
+def link_cell(pos):
+    """Grid cell size for candidate_pairs()."""
+    # typical spacing from the central 80% box, so a few escapers don't inflate it
+    lo, hi = np.percentile(pos, [10, 90], axis=0)
+    volume = float(np.prod(np.maximum(hi - lo, 1e-9))) / 0.8 ** 3
+    spacing = (volume / len(pos)) ** (1.0 / 3.0)
+    return CELL_SPACINGS * spacing
+
+
+def candidate_pairs(pos, mass=None, far=FAR_MASSIVE, cell=None):
+    """(i, j) pairs worth scoring, each unordered pair once."""
+    n = len(pos)
+    if n <= EXHAUSTIVE_MAX:
+        return np.triu_indices(n, 1)
+    i, j = SpatialGrid(pos, cell or link_cell(pos)).neighbour_pairs()
+    far = min(far, n)
+    if mass is None or far <= 0:
+        return i, j
+
+    # every body with each of the `far` heaviest; their grid pairs are dropped
+    # so nothing is scored twice, and heavy-heavy pairs are kept one way round
+    heavy = np.argpartition(-mass, far - 1)[:far]
+    is_heavy = np.zeros(n, dtype=bool)
+    is_heavy[heavy] = True
+    light = ~(is_heavy[i] | is_heavy[j])
+    hi = np.repeat(heavy, n)
+    hj = np.tile(np.arange(n), far)
+    once = (hi != hj) & ~(is_heavy[hj] & (hj < hi))
+    return np.concatenate((i[light], hi[once])), np.concatenate((j[light], hj[once]))
+
+
+def far_for_threshold(mass, G, softening, threshold, cell):
+    """How many of the heaviest bodies threshold mode pairs with everything."""
+    # pairs outside the grid's reach are >= cell apart; once the heavy set is
+    # the first k by mass, the strongest of them is bounded by the next two
+    m = np.sort(mass)[::-1].astype(np.float64)
+    bound = G * m[:-1] * m[1:] / (cell * cell + softening * softening)
+    below = np.flatnonzero(bound < threshold)
+    k = int(below[0]) if len(below) else len(m)
+    return min(max(k, FAR_MASSIVE), FAR_MAX)
+
+
+def select_links(pos, mass, G, softening, mode="strongest", k=2, threshold=0.0):
+    """(m, 2) array of body index pairs to draw."""
+    far, cell = FAR_MASSIVE, None
+    if mode == "threshold" and len(pos) > EXHAUSTIVE_MAX:
+        cell = link_cell(pos)
+        far = far_for_threshold(mass, G, softening, threshold, cell)
+    i, j = candidate_pairs(pos, mass, far, cell)
+    if len(i) == 0:
+        return np.zeros((0, 2), dtype=np.int64)
+    d  = pos[j] - pos[i]
+    r2 = np.einsum("ij,ij->i", d, d)
+
+    if mode == "threshold":
+        force = G * mass[i] * mass[j] / (r2 + softening ** 2)
+        keep = force >= threshold
+        return np.column_stack((i[keep], j[keep]))
+
+    score = -r2 if mode == "nearest" else mass[i] * mass[j] / (r2 + softening ** 2)
+    n = len(pos)
+    a, b = top_k_per_owner(np.concatenate((i, j)), np.concatenate((j, i)),
+                           np.concatenate((score, score)), k, n)
+    # a link picked from both ends is drawn once
+    packed = np.unique(np.minimum(a, b) * n + np.maximum(a, b))
+    return np.column_stack((packed // n, packed % n))
+
+
+def top_k_per_owner(owner, other, score, k, n):
+    """For every owner (0 .. n-1), its k (owner, other) entries with the highest score."""
+    score = score.astype(np.float64)
+    picked = []
+    for _ in range(k):
+        best = np.full(n, -np.inf)
+        np.maximum.at(best, owner, score)
+        hit = np.flatnonzero((score == best[owner]) & (score > -np.inf))
+        # one winner per owner, ties broken arbitrarily
+        winner = np.full(n, -1)
+        winner[owner[hit]] = hit
+        winner = winner[winner >= 0]
+        picked.append(winner)
+        score[winner] = -np.inf
+    picked = np.concatenate(picked)
+    return owner[picked], other[picked]
+
+
+class GravityLinks:
+    """select_links() cached between refreshes, and held to LINK_BUDGET of wall time."""
+
+    def __init__(self, budget=LINK_BUDGET):
+        self.pairs  = np.zeros((0, 2), dtype=np.int64)
+        self.bodies = None
+        self.key    = None
+        self.last   = -np.inf
+        self.cost   = 0.0      # wall seconds the last pick took
+        self.budget = budget
+
+    def update(self, bodies, mode, k, threshold, refresh_hz, now=None):
+        key = (mode, k, threshold, len(bodies))
+        changed = bodies is not self.bodies or key != self.key
+        due = now is None or refresh_hz <= 0 or now - self.last >= 1.0 / refresh_hz
+        affordable = now is None or now - self.last >= self.cost / self.budget
+        if (changed or due) and affordable:
+            start = time.perf_counter()
+            self.pairs = select_links(bodies.pos, bodies.mass, bodies.G, bodies.softening,
+                                      mode, k, threshold)
+            self.cost = time.perf_counter() - start
+            self.bodies, self.key = bodies, key
+            self.last = -np.inf if now is None else now
+        elif changed:
+            # the old pairs index a different body set; draw none until the next pick
+            self.pairs = np.zeros((0, 2), dtype=np.int64)
+        return self.pairs
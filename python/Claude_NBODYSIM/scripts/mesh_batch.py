@@ -0,0 +1,96 @@
+# scripts/mesh_batch.py
+"""
+A reusable dynamic mesh for geometry rebuilt on the CPU every frame.
+
+Callers fill batch.reserve(n) -> (vertices, colors) views in numpy and
+then call batch.draw(n): that is two buffer uploads and one draw call
+however much geometry there is. The GPU buffers only grow, so a steady
+scene never reallocates.
+"""
+import numpy as np
+import pyray as rl
+
+# smallest mesh worth allocating, in vertices (a multiple of 3)
+MIN_VERTICES = 3 * 1024
+
+
+class MeshBatch:
+
+    def __init__(self):
+        self.mesh     = None
+        self.material = None
+        self.capacity = 0
+
+    def reserve(self, vertices):
+        """(vertices, 3) float32 and (vertices, 4) uint8 arrays to write into."""
+        if vertices > self.capacity:
+            self._grow(vertices)
+        return self.vertices[:vertices], self.colors[:vertices]
+
+    def _grow(self, vertices):
+        self.release()
+        cap = max(vertices, 2 * self.capacity, MIN_VERTICES)
+        cap += -cap % 3
+
+        # raylib reads straight out of these arrays — keep them alive as long as the mesh
+        self.vertices  = np.zeros((cap, 3), dtype=np.float32)
+        self.colors    = np.zeros((cap, 4), dtype=np.uint8)
+        self.texcoords = np.zeros((cap, 2), dtype=np.float32)
+
+        mesh = rl.ffi.new("Mesh *")
+        mesh.vertexCount   = cap
+        mesh.triangleCount = cap // 3
+        mesh.vertices  = rl.ffi.cast("float *",         rl.ffi.from_buffer(self.vertices))
+        mesh.texcoords = rl.ffi.cast("float *",         rl.ffi.from_buffer(self.texcoords))
+        mesh.colors    = rl.ffi.cast("unsigned char *", rl.ffi.from_buffer(self.colors))
+        rl.upload_mesh(mesh, True)
+
+        self.mesh, self.capacity = mesh, cap
+        if self.material is None:
+            self.material = rl.load_material_default()
+
+    def release(self):
+        if self.mesh is None:
+            return
+        # the CPU arrays belong to numpy, only let raylib free the GPU side
+        self.mesh.vertices = self.mesh.texcoords = rl.ffi.NULL
+        self.mesh.colors   = rl.ffi.NULL
+        rl.unload_mesh(self.mesh[0])
+        self.mesh, self.capacity = None, 0
+
+    def draw_segments(self, start, end, start_colors, end_colors=None):
+        """
+        Lines start[i] -> end[i], all in one draw call. Colours are (m, 4) or
+        one (4,) RGBA. Each line is stored as the degenerate triangle
+        (start, end, end), which wire mode draws as the line itself.
+        """
+        m = len(start)
+        if m == 0:
+            return
+        start_colors = np.broadcast_to(start_colors, (m, 4))
+        end_colors   = start_colors if end_colors is None else np.broadcast_to(end_colors, (m, 4))
+        verts, cols = self.reserve(3 * m)
+        verts = verts.reshape(m, 3, 3)
+        verts[:, 0]  = start
+        verts[:, 1:] = end[:, None]
+        cols = cols.reshape(m, 3, 4)
+        cols[:, 0]  = start_colors
+        cols[:, 1:] = end_colors[:, None]
+        self.draw(3 * m, wire=True)
+
+    def draw(self, vertices, wire=False):
+        """Upload and draw the first `vertices` entries as triangles (or their edges)."""
+        if vertices == 0:
+            return
+        mesh = self.mesh[0]
+        rl.update_mesh_buffer(mesh, rl.RL_DEFAULT_SHADER_ATTRIB_LOCATION_POSITION,
+                              rl.ffi.from_buffer(self.vertices), vertices * 3 * 4, 0)
+        rl.update_mesh_buffer(mesh, rl.RL_DEFAULT_SHADER_ATTRIB_LOCATION_COLOR,
+                              rl.ffi.from_buffer(self.colors), vertices * 4, 0)
+        mesh.vertexCount = vertices
+
+        if wire:
+            rl.rl_enable_wire_mode()
+        rl.draw_mesh(mesh, self.material, rl.matrix_identity())
+        if wire:
+            rl.rl_disable_wire_mode()
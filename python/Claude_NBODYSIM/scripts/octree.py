@@ -0,0 +1,267 @@
+# scripts/octree.py
+"""
+Barnes–Hut gravity on an array-based octree.
+
+The tree is rebuilt from scratch every substep:
+    1. bodies are sorted along a Morton (z-order) curve, so every
+       octree cell owns one contiguous run of the sorted arrays
+    2. cells are split level by level until they hold <= leaf_size
+       bodies, node mass / centre of mass come from prefix sums
+    3. the walk runs breadth first over (leaf, node) pairs in NumPy,
+       far-away nodes are taken as a single point mass, near leaves
+       are summed directly, near internal nodes are opened
+
+No Python loop ever runs per body or per node — only per tree level.
+"""
+import numpy as np
+
+# bits of Morton key per axis, 3 * 21 = 63 fits in a uint64
+MAX_DEPTH = 21
+
+# bodies per leaf before a cell is split
+LEAF_SIZE = 16
+
+# roughly how many target bodies walk the tree together,
+# bounds the interaction arrays held at once
+WALK_CHUNK = 2048
+
+
+def _spread_bits(v):
+    """Insert two zero bits between each of the low 21 bits of v."""
+    v = v & np.uint64(0x1fffff)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    v = (v | (v << np.uint64(8)))  & np.uint64(0x100f00f00f00f00f)
+    v = (v | (v << np.uint64(4)))  & np.uint64(0x10c30c30c30c30c3)
+    v = (v | (v << np.uint64(2)))  & np.uint64(0x1249249249249249)
+    return v
+
+
+def _expand_ranges(starts, counts):
+    """Concatenate arange(s, s + c) for every (s, c), without a Python loop."""
+    total = int(counts.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+class Octree:
+    """
+    Flat octree over a set of point masses.
+
+    Bodies live in Morton order (self.order maps back to the caller's
+    indices). Node k covers sorted bodies [start[k], end[k]) and its
+    children are nodes [child_start[k], child_start[k] + child_count[k]).
+    A node with child_count == 0 is a leaf.
+    """
+
+    def __init__(self, pos, mass, leaf_size=LEAF_SIZE):
+        n = len(pos)
+        lo   = pos.min(axis=0)
+        span = float((pos.max(axis=0) - lo).max()) or 1.0
+        # pad so the far corner still maps inside the grid
+        span *= 1.0 + 1e-6
+
+        grid  = 1 << MAX_DEPTH
+        cells = ((pos - lo) / span * grid).astype(np.int64)
+        np.clip(cells, 0, grid - 1, out=cells)
+        ucell = cells.astype(np.uint64)
+        keys  = (_spread_bits(ucell[:, 0])
+                 | (_spread_bits(ucell[:, 1]) << np.uint64(1))
+                 | (_spread_bits(ucell[:, 2]) << np.uint64(2)))
+
+        self.order = np.argsort(keys, kind="stable")
+        self.pos   = pos[self.order]
+        self.mass  = mass[self.order]
+        keys       = keys[self.order]
+        cells      = cells[self.order]
+
+        # prefix sums turn any node's mass / first moment into two lookups
+        cm  = np.concatenate(([0.0], np.cumsum(self.mass, dtype=np.float64)))
+        cmx = np.vstack((np.zeros((1, 3)), np.cumsum(self.mass[:, None] * self.pos, axis=0, dtype=np.float64)))
+
+        starts, ends, levels = [np.array([0])], [np.array([n])], [np.array([0])]
+        child_start, child_count = [], []
+        n_nodes = 1
+
+        level_start, level_end = starts[0], ends[0]
+        for level in range(MAX_DEPTH + 1):
+            split = (level_end - level_start > leaf_size) if level < MAX_DEPTH else np.zeros(len(level_start), bool)
+            c_start = np.zeros(len(level_start), dtype=np.int64)
+            c_count = np.zeros(len(level_start), dtype=np.int64)
+
+            if not split.any():
+                child_start.append(c_start)
+                child_count.append(c_count)
+                break
+
+            # every body inside a cell that is being split, in sorted order
+            p_start, p_end = level_start[split], level_end[split]
+            idx = _expand_ranges(p_start, p_end - p_start)
+            prefix = keys[idx] >> np.uint64(3 * (MAX_DEPTH - level - 1))
+
+            # a new child cell starts wherever the next-level prefix changes
+            run = np.flatnonzero(np.concatenate(([True], prefix[1:] != prefix[:-1])))
+            ch_start = idx[run]
+            ch_end   = np.append(idx[run[1:] - 1] + 1, idx[-1] + 1)
+
+            parent = np.searchsorted(p_start, ch_start, side="right") - 1
+            per_parent = np.bincount(parent, minlength=len(p_start))
+            c_count[split] = per_parent
+            c_start[split] = n_nodes + np.cumsum(per_parent) - per_parent
+
+            child_start.append(c_start)
+            child_count.append(c_count)
+            starts.append(ch_start)
+            ends.append(ch_end)
+            levels.append(np.full(len(ch_start), level + 1))
+            n_nodes += len(ch_start)
+            level_start, level_end = ch_start, ch_end
+
+        self.start       = np.concatenate(starts)
+        self.end         = np.concatenate(ends)
+        self.level       = np.concatenate(levels)
+        self.child_start = np.concatenate(child_start)
+        self.child_count = np.concatenate(child_count)
+
+        node_mass = cm[self.end] - cm[self.start]
+        safe      = np.where(node_mass > 0, node_mass, 1.0)
+        self.node_mass = node_mass.astype(pos.dtype)
+        self.com       = ((cmx[self.end] - cmx[self.start]) / safe[:, None]).astype(pos.dtype)
+
+        # geometric cell: edge length and centre (from the first body's cell coords)
+        self.size = span / (1 << self.level)
+        shift     = (MAX_DEPTH - self.level)[:, None]
+        corner    = (cells[self.start] >> shift) << shift
+        centre    = lo + (corner + (1 << shift) * 0.5) * (span / grid)
+        # distance from the cell centre to its centre of mass, used to
+        # tighten the opening test for lopsided cells
+        self.delta = np.sqrt(((self.com - centre) ** 2).sum(axis=1))
+
+    def accelerations(self, G, theta, softening):
+        """
+        Acceleration on every body (in the caller's original order).
+
+        The walk is done per leaf rather than per body: a leaf's bodies
+        share one interaction list, opened against the leaf's bounding
+        sphere, so traversal cost scales with the number of leaves.
+        """
+        return self._walk(G, theta, softening, _accumulate)
+
+    def potentials(self, G, theta, softening):
+        """Softened potential at every body (float64, original order), same walk."""
+        return self._walk(G, theta, softening, _accumulate_phi)
+
+    def _walk(self, G, theta, softening, accumulate):
+        potential = accumulate is _accumulate_phi
+        n    = len(self.pos)
+        eps2 = softening * softening
+        # a node is far enough to be a point mass when d > size / theta + delta
+        open_r  = self.size / max(theta, 1e-9) + self.delta
+        gm_node = G * self.node_mass
+        gm_body = G * self.mass
+        # 1-D component arrays gather much faster than (n, 3) rows
+        bx, by, bz = (np.ascontiguousarray(self.pos[:, k]) for k in range(3))
+        cx, cy, cz = (np.ascontiguousarray(self.com[:, k]) for k in range(3))
+
+        # leaves in Morton order cover the sorted bodies exactly once
+        leaves = np.flatnonzero(self.child_count == 0)
+        leaves = leaves[np.argsort(self.start[leaves])]
+        g_start, g_end = self.start[leaves], self.end[leaves]
+        g_lo = np.minimum.reduceat(self.pos, g_start, axis=0)
+        g_hi = np.maximum.reduceat(self.pos, g_start, axis=0)
+        g_centre = 0.5 * (g_lo + g_hi)
+        g_radius = 0.5 * np.sqrt(((g_hi - g_lo) ** 2).sum(axis=1))
+
+        acc = np.zeros(n if potential else (n, 3), dtype=np.float64)
+        first = 0
+        while first < len(leaves):
+            # take whole leaves until the chunk holds about WALK_CHUNK bodies
+            last = np.searchsorted(g_start, g_start[first] + WALK_CHUNK, side="left")
+            last = max(last, first + 1)
+            lo_b, hi_b = g_start[first], g_end[last - 1]
+
+            g  = np.arange(first, last)
+            nd = np.zeros(len(g), dtype=np.int64)
+            far_g, far_n, near_g, near_n = [], [], [], []
+            while len(g):
+                d    = self.com[nd] - g_centre[g]
+                dist = np.sqrt(np.einsum("ij,ij->i", d, d))
+                far  = dist - g_radius[g] > open_r[nd]
+                leaf = self.child_count[nd] == 0
+                near_leaf = ~far & leaf
+                inner     = ~far & ~leaf
+
+                far_g.append(g[far]);        far_n.append(nd[far])
+                near_g.append(g[near_leaf]); near_n.append(nd[near_leaf])
+
+                ig, inn = g[inner], nd[inner]
+                cnt = self.child_count[inn]
+                g   = np.repeat(ig, cnt)
+                nd  = _expand_ranges(self.child_start[inn], cnt)
+
+            local = np.zeros((hi_b - lo_b,) + acc.shape[1:])
+
+            # far nodes: every body of the leaf sees one point mass
+            fg, fn = np.concatenate(far_g), np.concatenate(far_n)
+            size = g_end[fg] - g_start[fg]
+            tb   = _expand_ranges(g_start[fg], size)
+            fn   = np.repeat(fn, size)
+            accumulate(local, tb - lo_b, cx[fn] - bx[tb], cy[fn] - by[tb], cz[fn] - bz[tb],
+                        gm_node[fn], eps2)
+
+            # near leaves: each body of the leaf against every body of the other
+            ng, nn = np.concatenate(near_g), np.concatenate(near_n)
+            size = g_end[ng] - g_start[ng]
+            tb   = _expand_ranges(g_start[ng], size)
+            nn   = np.repeat(nn, size)
+            cnt  = self.end[nn] - self.start[nn]
+            src  = _expand_ranges(self.start[nn], cnt)
+            tb   = np.repeat(tb, cnt)
+            if potential:
+                # a body has no potential from itself (its force is 0 anyway: d = 0)
+                keep = src != tb
+                tb, src = tb[keep], src[keep]
+            accumulate(local, tb - lo_b, bx[src] - bx[tb], by[src] - by[tb], bz[src] - bz[tb],
+                        gm_body[src], eps2)
+
+            acc[lo_b:hi_b] = local
+            first = last
+
+        out = np.empty_like(acc)
+        out[self.order] = acc
+        return out if potential else out.astype(self.pos.dtype, copy=False)
+
+
+def _accumulate(acc, target, dx, dy, dz, gm, eps2):
+    """acc[target] += gm * d / (|d|^2 + eps2)^(3/2), summed with bincount."""
+    r2 = dx * dx
+    r2 += dy * dy
+    r2 += dz * dz
+    r2 += eps2
+    # unsoftened, coincident bodies (and the self pair) would be 0 / 0: they pull on nothing
+    w = np.zeros_like(r2)
+    np.divide(gm, r2 * np.sqrt(r2), out=w, where=r2 > 0)
+    n = len(acc)
+    acc[:, 0] += np.bincount(target, weights=w * dx, minlength=n)
+    acc[:, 1] += np.bincount(target, weights=w * dy, minlength=n)
+    acc[:, 2] += np.bincount(target, weights=w * dz, minlength=n)
+
+
+def _accumulate_phi(phi, target, dx, dy, dz, gm, eps2):
+    """phi[target] -= gm / sqrt(|d|^2 + eps2)."""
+    r2 = dx * dx
+    r2 += dy * dy
+    r2 += dz * dz
+    r2 += eps2
+    w = np.zeros_like(r2)
+    np.divide(gm, np.sqrt(r2), out=w, where=r2 > 0)
+    phi -= np.bincount(target, weights=w, minlength=len(phi))
+
+
+def barnes_hut_accelerations(pos, mass, G, theta=0.7, softening=0.1, leaf_size=LEAF_SIZE):
+    """Build an octree over pos / mass and return every body's acceleration."""
+    if len(pos) == 0:
+        return np.zeros((0, 3), dtype=pos.dtype)
+    return Octree(pos, mass, leaf_size).accelerations(G, theta, softening)
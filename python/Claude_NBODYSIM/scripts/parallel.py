@@ -0,0 +1,163 @@
+# scripts/parallel.py
+"""
+Multi-core direct summation.
+
+The rows of the interaction matrix are cut into tiles and handed to a
+persistent pool of worker processes. Positions and masses go into
+multiprocessing.shared_memory once per evaluation, every worker reads
+them from there and writes its tile's accelerations straight into a
+shared output block, so the only thing crossing a pipe per tile is a
+small tuple.
+
+Workers are spawned (not forked) so it's safe to start the pool from
+any thread, and they live until the program exits — creating them
+costs far more than one substep.
+"""
+import atexit
+import os
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+
+# below this many bodies one core wins, dispatch costs more than it saves
+PARALLEL_MIN_BODIES = 2048
+
+# tiles per worker — more than one evens out uneven cores
+TILES_PER_WORKER = 2
+
+# keep each worker's BLAS single-threaded, the pool already fills the cores
+_BLAS_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def _attach(name):
+    """Open an existing block without letting this process unlink it at exit."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track=; spawned workers share the parent's
+        # resource tracker, which already owns the block, so a plain attach is fine
+        return shared_memory.SharedMemory(name=name)
+
+
+def _worker(tasks, done):
+    from scripts.physics import pairwise_accelerations
+
+    attached = {}
+    while True:
+        msg = tasks.get()
+        if msg is None:
+            break
+        names, n, dtype, G, softening, start, stop = msg
+        try:
+            if set(attached) != set(names):
+                for shm in attached.values():
+                    shm.close()
+                attached = {name: _attach(name) for name in names}
+            pos_shm, mass_shm, acc_shm = (attached[name] for name in names)
+            pos  = np.ndarray((n, 3), dtype=dtype, buffer=pos_shm.buf)
+            mass = np.ndarray((n,),   dtype=dtype, buffer=mass_shm.buf)
+            acc  = np.ndarray((n, 3), dtype=dtype, buffer=acc_shm.buf)
+            acc[start:stop] = pairwise_accelerations(pos, mass, G, softening, np.arange(start, stop))
+            done.put((start, None))
+        except Exception:
+            done.put((start, traceback.format_exc()))
+        # drop array views before a possible close() on the next rebind
+        pos = mass = acc = None
+
+
+class ForcePool:
+    """Persistent worker processes plus the shared blocks they read and write."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        ctx = mp.get_context("spawn")
+        self.tasks = ctx.Queue()
+        self.done  = ctx.Queue()
+
+        saved = {k: os.environ.get(k) for k in _BLAS_ENV}
+        os.environ.update({k: "1" for k in _BLAS_ENV})
+        try:
+            self.procs = [ctx.Process(target=_worker, args=(self.tasks, self.done), daemon=True)
+                          for _ in range(workers)]
+            for p in self.procs:
+                p.start()
+        finally:
+            for k, v in saved.items():
+                if v is None:
+                    os.environ.pop(k, None)
+                else:
+                    os.environ[k] = v
+
+        self.blocks = []
+        self.shape  = None
+
+    def _ensure(self, n, dtype):
+        """(Re)allocate the shared blocks when body count or precision changes."""
+        if self.shape == (n, dtype):
+            return
+        self._free()
+        item = dtype.itemsize
+        self.blocks = [shared_memory.SharedMemory(create=True, size=max(1, size * item))
+                       for size in (n * 3, n, n * 3)]
+        self.pos  = np.ndarray((n, 3), dtype=dtype, buffer=self.blocks[0].buf)
+        self.mass = np.ndarray((n,),   dtype=dtype, buffer=self.blocks[1].buf)
+        self.acc  = np.ndarray((n, 3), dtype=dtype, buffer=self.blocks[2].buf)
+        self.shape = (n, dtype)
+
+    def _free(self):
+        self.pos = self.mass = self.acc = None
+        for shm in self.blocks:
+            shm.close()
+            shm.unlink()
+        self.blocks = []
+        self.shape  = None
+
+    def accelerations(self, pos, mass, G, softening):
+        n = len(pos)
+        self._ensure(n, pos.dtype)
+        self.pos[:]  = pos
+        self.mass[:] = mass
+
+        names = tuple(shm.name for shm in self.blocks)
+        edges = np.linspace(0, n, self.workers * TILES_PER_WORKER + 1).astype(int)
+        tiles = [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+        for a, b in tiles:
+            self.tasks.put((names, n, pos.dtype.str, G, softening, a, b))
+
+        errors = [err for _, err in (self.done.get() for _ in tiles) if err]
+        if errors:
+            raise RuntimeError("force worker failed:\n" + errors[0])
+        return self.acc.copy()
+
+    def close(self):
+        for _ in self.procs:
+            self.tasks.put(None)
+        for p in self.procs:
+            p.join(timeout=1.0)
+            if p.is_alive():
+                p.terminate()
+        self._free()
+
+
+_pools = {}
+
+def get_pool(workers):
+    """The shared pool with this many workers, started on first use."""
+    if workers not in _pools:
+        _pools[workers] = ForcePool(workers)
+    return _pools[workers]
+
+@atexit.register
+def shutdown_pools():
+    while _pools:
+        _pools.popitem()[1].close()
+
+
+def parallel_accelerations(pos, mass, G, softening, workers=0):
+    """Direct summation spread over `workers` processes (0 = every core)."""
+    workers = workers or os.cpu_count() or 1
+    if len(pos) < PARALLEL_MIN_BODIES or workers < 2:
+        from scripts.physics import pairwise_accelerations
+        return pairwise_accelerations(pos, mass, G, softening)
+    return get_pool(workers).accelerations(pos, mass, G, softening)
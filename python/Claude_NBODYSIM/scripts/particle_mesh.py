@@ -0,0 +1,124 @@
+# scripts/particle_mesh.py
+"""
+Particle-mesh gravity for very large N.
+
+    1. deposit every body's mass onto an (n, n, n) grid with cloud-in-cell
+    2. convolve with the softened 1/r kernel using numpy.fft on a grid
+       zero-padded to (2n)^3, so the box behaves as isolated space
+       rather than a periodic one
+    3. take the gradient of the potential and interpolate it back to
+       the bodies with the same cloud-in-cell weights
+
+Cost is O(N + n^3 log n) instead of O(N^2). Forces are smoothed on the
+scale of one grid cell, so close encounters are not resolved — this is
+for galaxy-scale scenes where the large-scale field matters.
+"""
+from functools import lru_cache
+import numpy as np
+
+# the grid is sized to the bounding box plus this fraction on each side
+BOX_MARGIN = 0.05
+
+# cell sizes are rounded up to a power of 2^(1/CELL_STEPS) so the
+# kernel FFT can be reused from one step to the next
+CELL_STEPS = 8
+
+
+@lru_cache(maxsize=4)
+def _green_fft(n, cell, softening):
+    """FFT of -1 / sqrt(r^2 + eps^2) on the (2n)^3 padded grid, r in world units."""
+    m = 2 * n
+    # distances wrap around so the kernel is symmetric on the padded grid
+    k = np.arange(m)
+    k = np.minimum(k, m - k) * cell
+    r2 = k[:, None, None] ** 2 + k[None, :, None] ** 2 + k[None, None, :] ** 2
+    # never let the kernel get sharper than the grid can represent
+    eps2 = max(softening, 0.5 * cell) ** 2
+    return np.fft.rfftn(-1.0 / np.sqrt(r2 + eps2))
+
+
+def _cic_weights(pos, lo, cell, n):
+    """Lower cell index and the two per-axis weights for cloud-in-cell."""
+    # grid values live at cell centres
+    u  = (pos - lo) / cell - 0.5
+    i0 = np.clip(np.floor(u).astype(np.int64), 0, n - 2)
+    f  = np.clip(u - i0, 0.0, 1.0)
+    return i0, 1.0 - f, f
+
+
+def _corners(i0, w0, w1, n):
+    """Yield (flat grid index, weight) for the 8 cells around each body."""
+    for dx in (0, 1):
+        wx = w1[:, 0] if dx else w0[:, 0]
+        for dy in (0, 1):
+            wy = w1[:, 1] if dy else w0[:, 1]
+            for dz in (0, 1):
+                wz = w1[:, 2] if dz else w0[:, 2]
+                flat = ((i0[:, 0] + dx) * n + (i0[:, 1] + dy)) * n + (i0[:, 2] + dz)
+                yield flat, wx * wy * wz
+
+
+def _pm_potential(pos, mass, G, grid, softening):
+    """Mesh potential, the bodies' cloud-in-cell corners and the cell size."""
+    n = max(int(grid), 4)
+
+    lo, hi = pos.min(axis=0), pos.max(axis=0)
+    extent = float((hi - lo).max()) or 1.0
+    cell   = extent * (1.0 + 2.0 * BOX_MARGIN) / (n - 2)
+    cell   = 2.0 ** (np.ceil(np.log2(cell) * CELL_STEPS) / CELL_STEPS)
+    # centre the (quantized) box on the bodies
+    lo = 0.5 * (lo + hi) - 0.5 * n * cell
+
+    i0, w0, w1 = _cic_weights(pos.astype(np.float64), lo, cell, n)
+    corners = list(_corners(i0, w0, w1, n))
+
+    rho = np.zeros(n ** 3)
+    for flat, w in corners:
+        rho += np.bincount(flat, weights=w * mass, minlength=n ** 3)
+    rho = rho.reshape(n, n, n)
+
+    # isolated convolution: pad to 2n, multiply spectra, keep the first n^3
+    phi = np.fft.irfftn(np.fft.rfftn(rho, s=(2 * n,) * 3) * _green_fft(n, cell, softening),
+                        s=(2 * n,) * 3)[:n, :n, :n]
+    phi *= G
+    return phi, corners, cell
+
+
+def pm_accelerations(pos, mass, G, grid=64, softening=0.1):
+    """Acceleration on every body from the particle-mesh potential."""
+    if len(pos) == 0:
+        return np.zeros((0, 3), dtype=pos.dtype)
+    phi, corners, cell = _pm_potential(pos, mass, G, grid, softening)
+
+    # a = -grad(phi), interpolated back with the same weights
+    acc = np.zeros((len(pos), 3))
+    for k, g in enumerate(np.gradient(phi, cell)):
+        g = g.ravel()
+        for flat, w in corners:
+            acc[:, k] -= w * g[flat]
+    return acc.astype(pos.dtype, copy=False)
+
+
+def pm_potentials(pos, mass, G, grid=64, softening=0.1):
+    """
+    Potential at every body from the mesh (float64), for energy
+    diagnostics. Each body's own smoothed cloud is taken back out, so the
+    result compares with physics.pairwise_potentials.
+    """
+    if len(pos) == 0:
+        return np.zeros(0)
+    phi, corners, cell = _pm_potential(pos, mass, G, grid, softening)
+    phi = phi.ravel()
+    out = np.zeros(len(pos))
+    for flat, w in corners:
+        out += w * phi[flat]
+
+    # take out each body's own cloud: its 8 weights against each other through the kernel
+    eps2 = max(softening, 0.5 * cell) ** 2
+    offsets = np.array([(dx, dy, dz) for dx in (0, 1) for dy in (0, 1) for dz in (0, 1)])
+    gm = G * mass.astype(np.float64)
+    for a, (_, wa) in enumerate(corners):
+        for b, (_, wb) in enumerate(corners):
+            r2 = float(((offsets[a] - offsets[b]) ** 2).sum()) * cell * cell
+            out += gm * wa * wb / np.sqrt(r2 + eps2)
+    return out
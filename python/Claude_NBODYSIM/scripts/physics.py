@@ -1,46 +1,337 @@
 # scripts/physics.py
-from utils.vector3D import Vector3D
+import numpy as np
+from scripts.octree import barnes_hut_accelerations
+from scripts.particle_mesh import pm_accelerations
+from scripts.integrators import INTEGRATORS
+from scripts.parallel import parallel_accelerations
+from scripts.arrows import build_arrows
+from scripts.collisions import merge_collisions
 
+# Plummer softening length — keeps F finite when two bodies overlap
+SOFTENING = 0.1
 
-def compute_forces(bodies, G):
+# how many (target, source) pairs one tile of the force kernel may hold,
+# bounds the temporary arrays to a few MB no matter how many bodies there are
+TILE_PAIRS = 1 << 18
 
-    # clear forces from previous frame
-    for body in bodies:
-        body.forces = []
 
-    # compute forces for each unique set of bodies
-    for i, b1 in enumerate(bodies):
-        for b2 in bodies[i+1:]: # address each pair once
-            
-            displacement = b2.position - b1.position
-            distance = displacement.length()
+def pairwise_accelerations(pos, mass, G, softening=SOFTENING, targets=None):
+    """
+    Direct-summation gravity, batched over tiles of the interaction matrix.
 
-            # Newton's law: F = G * m1 * m2 / r^2
-            force_magnitude = G * (b1.mass * b2.mass) / (distance**2 + 0.01)
+    pos       (n, 3) source positions
+    mass      (n,)   source masses
+    targets   optional index array — only compute acceleration for these rows
 
-            force_direction = displacement.normalize()
-            force_vec = force_direction * force_magnitude
+    a_i = G * sum_j m_j * (x_j - x_i) / (|x_j - x_i|^2 + eps^2)^(3/2)
 
-            # add computed forces to state list
-            b1.forces.append((force_vec, b2))
-            b2.forces.append((-force_vec, b1))
+    Both |x_j - x_i|^2 and the weighted sum are expanded into matrix
+    products so the heavy lifting happens in BLAS instead of building
+    (tile, n, 3) difference arrays. Both expansions subtract large,
+    nearly equal terms for a close pair far from the centroid, so they
+    are always done in float64 — in float32 such a pair's force can be
+    off by orders of magnitude. The result comes back in pos.dtype.
+    """
+    n = len(pos)
+    rows = np.arange(n) if targets is None else np.asarray(targets)
+    acc = np.zeros((len(rows), 3), dtype=pos.dtype)
+    if n == 0 or len(rows) == 0:
+        return acc
 
-def apply_forces(bodies, dt):
+    # work relative to the centroid to keep the |a|^2 + |b|^2 - 2ab expansion accurate
+    p    = pos.astype(np.float64)
+    p   -= p.mean(axis=0)
+    sq   = np.einsum("ij,ij->i", p, p)
+    eps2 = softening * softening
+    gm   = G * mass.astype(np.float64)
+    tile = max(1, TILE_PAIRS // n)
 
-    for body in bodies:
-        total_force = Vector3D(0, 0, 0)
+    for start in range(0, len(rows), tile):
+        r  = rows[start:start + tile]
+        pr = p[r]
 
-        for f, _ in body.forces:
-            total_force += f
+        # w_ij = G m_j / r_ij^3, built in place
+        w = pr @ p.T
+        w *= -2.0
+        w += sq[None, :]
+        w += sq[r, None]
+        np.maximum(w, 0.0, out=w)
+        w += eps2
+        np.multiply(w, np.sqrt(w), out=w)
+        np.divide(1.0, w, out=w, where=w > 0)
+        # a body never pulls on itself
+        w[np.arange(len(r)), r] = 0.0
+        w *= gm[None, :]
 
-        #a = F/m
-        acceleration = total_force / body.mass
+        # sum_j w_ij (x_j - x_i) = (W @ x)_i - x_i * sum_j w_ij
+        acc[start:start + len(r)] = w @ p - pr * w.sum(axis=1)[:, None]
 
-        # symplectic Euler integraation:
-        # update velocity, then position
-        body.velocity += acceleration * dt
-        body.position += body.velocity * dt
+    return acc
 
-def sim_step(bodies, dt, G):
-    compute_forces(bodies, G)
-    apply_forces(bodies, dt)
+
+def pairwise_potentials(pos, mass, G, softening=SOFTENING):
+    """
+    Softened gravitational potential at every body, direct summation.
+
+    phi_i = -G * sum_{j != i} m_j / sqrt(|x_j - x_i|^2 + eps^2)
+
+    Total potential energy is 0.5 * sum(mass * phi).
+    """
+    n = len(pos)
+    phi = np.zeros(n, dtype=np.float64)
+    if n < 2:
+        return phi
+
+    p    = (pos - pos.mean(axis=0)).astype(np.float64)
+    sq   = np.einsum("ij,ij->i", p, p)
+    gm   = G * mass.astype(np.float64)
+    tile = max(1, TILE_PAIRS // n)
+
+    for start in range(0, n, tile):
+        stop = min(n, start + tile)
+        w = p[start:stop] @ p.T
+        w *= -2.0
+        w += sq[None, :]
+        w += sq[start:stop, None]
+        np.maximum(w, 0.0, out=w)
+        w += softening * softening
+        np.sqrt(w, out=w)
+        np.divide(1.0, w, out=w, where=w > 0)
+        w[np.arange(stop - start), np.arange(start, stop)] = 0.0
+        phi[start:stop] = -(w @ gm)
+
+    return phi
+
+
+def direct_backend(pos, mass, sim):
+    return pairwise_accelerations(pos, mass, sim.gravity_constant, sim.softening)
+
+def direct_parallel_backend(pos, mass, sim):
+    return parallel_accelerations(pos, mass, sim.gravity_constant, sim.softening, sim.workers)
+
+def barnes_hut_backend(pos, mass, sim):
+    return barnes_hut_accelerations(pos, mass, sim.gravity_constant, sim.theta, sim.softening)
+
+def particle_mesh_backend(pos, mass, sim):
+    return pm_accelerations(pos, mass, sim.gravity_constant, sim.pm_grid, sim.softening)
+
+# name -> fn(pos, mass, sim) returning (n, 3) accelerations,
+# SimulationState.force_backend picks one of these
+FORCE_BACKENDS = {
+    "direct"          : direct_backend,
+    "direct_parallel" : direct_parallel_backend,
+    "barnes_hut"      : barnes_hut_backend,
+    "particle_mesh"   : particle_mesh_backend,
+}
+
+# block timesteps carry their own (direct, with jerk) forces, so they
+# sit outside INTEGRATORS — INTEGRATOR_NAMES is what the UI cycles through
+BLOCK_HERMITE    = "hermite_block"
+INTEGRATOR_NAMES = [*INTEGRATORS, BLOCK_HERMITE]
+
+
+def acc_jerk(pos, vel, mass, G, softening=SOFTENING, targets=None):
+    """
+    Direct-summation acceleration and jerk (da/dt) for the target rows.
+
+    j_i = G * sum_j m_j * [ v_ij / r^3 - 3 (r_ij . v_ij) r_ij / r^5 ]
+
+    Needed by the Hermite scheme; sources are always every body.
+    """
+    n = len(pos)
+    rows = np.arange(n) if targets is None else np.asarray(targets)
+    acc  = np.zeros((len(rows), 3), dtype=pos.dtype)
+    jerk = np.zeros((len(rows), 3), dtype=pos.dtype)
+    if n == 0 or len(rows) == 0:
+        return acc, jerk
+
+    eps2 = softening * softening
+    gm   = G * mass
+    tile = max(1, TILE_PAIRS // n)
+
+    for start in range(0, len(rows), tile):
+        r  = rows[start:start + tile]
+        dx = pos[None, :, :] - pos[r, None, :]
+        dv = vel[None, :, :] - vel[r, None, :]
+
+        r2 = np.einsum("ijk,ijk->ij", dx, dx) + eps2
+        w  = 1.0 / (r2 * np.sqrt(r2))
+        # a body never pulls on itself
+        w[np.arange(len(r)), r] = 0.0
+        w *= gm[None, :]
+        rv = 3.0 * np.einsum("ijk,ijk->ij", dx, dv) / r2
+
+        acc[start:start + len(r)]  = np.einsum("ij,ijk->ik", w, dx)
+        jerk[start:start + len(r)] = np.einsum("ij,ijk->ik", w, dv) - np.einsum("ij,ijk->ik", w * rv, dx)
+
+    return acc, jerk
+
+
+class BlockState:
+    """
+    Hermite history kept between sim_step calls: the synchronized state
+    it last produced (to spot outside edits) and every body's acc, jerk
+    and preferred timestep.
+    """
+
+    def __init__(self, key, pos, vel, acc, jerk, dt_pref):
+        self.key     = key
+        self.pos     = pos.copy()
+        self.vel     = vel.copy()
+        self.acc     = acc
+        self.jerk    = jerk
+        self.dt_pref = dt_pref
+        self.level   = None
+
+    def matches(self, bodies, key):
+        return (self.key == key and len(self.pos) == len(bodies)
+                and np.array_equal(self.pos, bodies.pos)
+                and np.array_equal(self.vel, bodies.vel))
+
+
+def _norm(v):
+    return np.sqrt(np.einsum("ij,ij->i", v, v))
+
+def _safe_ratio(num, den):
+    # timestep criteria: a zero denominator means "no constraint"
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(den > 0, num / np.where(den > 0, den, 1.0), np.inf)
+
+
+def block_hermite_step(bodies, dt, sim):
+    """
+    Advance every body by dt with individual power-of-two timesteps.
+
+    Inside the step each body runs at dt / 2^k for a level
+    k <= sim.block_levels chosen from its own acc / jerk (Aarseth's
+    criterion). At every block time only the bodies due are re-evaluated
+    and corrected with the 4th-order Hermite scheme; the rest are just
+    predicted forward as sources. All bodies line up again at the end,
+    so render / hud see one consistent snapshot.
+
+    Forces are always direct summation here, the jerk needs pairwise terms.
+    """
+    n = len(bodies)
+    if n == 0 or dt <= 0:
+        return
+    G, eps, eta = sim.gravity_constant, sim.softening, sim.block_eta
+    L = int(sim.block_levels)
+
+    key = (G, eps)
+    st  = bodies.integrator_state
+    if not (isinstance(st, BlockState) and st.matches(bodies, key)):
+        a, j = acc_jerk(bodies.pos, bodies.vel, bodies.mass, G, eps)
+        # simple |a| / |j| criterion to start, with a safety factor
+        st = BlockState(key, bodies.pos, bodies.vel, a, j, 0.5 * eta * _safe_ratio(_norm(a), _norm(j)))
+
+    x, v, a, j = bodies.pos.copy(), bodies.vel.copy(), st.acc.copy(), st.jerk.copy()
+    dt_pref = st.dt_pref.copy()
+
+    # integer time: the whole step is 2^L ticks, level k steps 2^(L-k) ticks
+    total = 1 << L
+    tick  = dt / total
+    with np.errstate(divide="ignore"):
+        level = np.clip(np.ceil(np.log2(dt / dt_pref)), 0, L).astype(np.int64)
+    step = np.left_shift(1, L - level)
+    t    = np.zeros(n, dtype=np.int64)
+
+    while t.min() < total:
+        due    = t + step
+        t_next = due.min()
+        active = np.flatnonzero(due == t_next)
+
+        # predict every body to t_next (they act as sources)
+        h  = ((t_next - t) * tick)[:, None]
+        xp = x + h * (v + h * (a / 2 + h * j / 6))
+        vp = v + h * (a + h * j / 2)
+
+        a1, j1 = acc_jerk(xp, vp, bodies.mass, G, eps, targets=active)
+
+        # Hermite corrector for the active bodies
+        h  = (step[active] * tick)[:, None]
+        a0, j0 = a[active], j[active]
+        a2 = (-6.0 * (a0 - a1) - h * (4.0 * j0 + 2.0 * j1)) / h**2
+        a3 = (12.0 * (a0 - a1) + 6.0 * h * (j0 + j1)) / h**3
+        x[active] = xp[active] + h**4 * a2 / 24 + h**5 * a3 / 120
+        v[active] = vp[active] + h**3 * a2 / 6  + h**4 * a3 / 24
+        a[active], j[active] = a1, j1
+        t[active] = t_next
+
+        # Aarseth: dt = sqrt(eta (|a||a2| + |j|^2) / (|j||a3| + |a2|^2)), derivatives at t_next
+        a2 = a2 + h * a3
+        na, nj, n2, n3 = _norm(a1), _norm(j1), _norm(a2), _norm(a3)
+        dt_pref[active] = np.sqrt(eta * _safe_ratio(na * n2 + nj**2, nj * n3 + n2**2))
+
+        # shrinking is always allowed, growing only one level at a time
+        # and only when t_next lies on the coarser grid
+        with np.errstate(divide="ignore"):
+            want = np.clip(np.ceil(np.log2(dt / dt_pref[active])), 0, L).astype(np.int64)
+        cur  = level[active]
+        up   = (want < cur) & (t_next % (2 * step[active]) == 0)
+        new  = np.where(want > cur, want, np.where(up, cur - 1, cur))
+        level[active] = new
+        step[active]  = np.left_shift(1, L - new)
+
+    bodies.pos[:], bodies.vel[:], bodies.acc[:] = x, v, a
+    # acc here is always direct summation, so don't let another integrator reuse it
+    bodies.acc_valid = False
+    st.pos, st.vel, st.acc, st.jerk, st.dt_pref = x.copy(), v.copy(), a, j, dt_pref
+    st.level = level
+    bodies.integrator_state = st
+
+
+def active_backend(sim):
+    # the force backend actually in use: hermite_block carries its own
+    # direct-summation forces (with jerk), whatever force_backend says
+    return "direct" if sim.integrator == BLOCK_HERMITE else sim.force_backend
+
+def force_key(sim):
+    # everything the force law depends on; cached accelerations and
+    # diagnostics baselines are only comparable under the same key
+    return (active_backend(sim), sim.gravity_constant, sim.softening, sim.theta, sim.pm_grid)
+
+def compute_forces(bodies, sim):
+    # fill bodies.acc with the net gravitational acceleration on every body
+    backend = FORCE_BACKENDS[active_backend(sim)]
+    bodies.acc[:] = backend(bodies.pos, bodies.mass, sim)
+    bodies.acc_valid, bodies.force_key = True, force_key(sim)
+    bodies.G, bodies.softening = sim.gravity_constant, sim.softening
+    return bodies.acc
+
+def update_arrows(bodies, sim, focus=()):
+    # display-ready force arrows for the current positions (scripts/arrows.py),
+    # net force for everyone plus the pair breakdown for the bodies in focus;
+    # acc is recomputed unless it still matches pos (symplectic_euler, rk4,
+    # hermite_block and mergers all leave it behind), and the next step reuses it
+    if not bodies.acc_valid or bodies.force_key != force_key(sim):
+        compute_forces(bodies, sim)
+    bodies.arrows = build_arrows(bodies, focus, sim.arrow_pairs_max, sim.arrow_top_k)
+    return bodies.arrows
+
+def sim_step(bodies, dt, sim, emit_arrows=False, focus=()):
+    # advance every body by dt with the integrator / force backend chosen on sim,
+    # then merge touching bodies if sim.merge_collisions (scripts/collisions.py);
+    # emit_arrows also leaves display-ready force arrows in bodies.arrows
+    _step(bodies, dt, sim)
+    if sim.merge_collisions:
+        merge_collisions(bodies)
+    bodies.G, bodies.softening = sim.gravity_constant, sim.softening
+    bodies.arrows = update_arrows(bodies, sim, focus) if emit_arrows else None
+
+def _step(bodies, dt, sim):
+    if sim.integrator == BLOCK_HERMITE:
+        block_hermite_step(bodies, dt, sim)
+        return
+
+    backend    = FORCE_BACKENDS[sim.force_backend]
+    integrator = INTEGRATORS[sim.integrator]
+
+    def accel(pos):
+        return backend(pos, bodies.mass, sim)
+
+    # a reused end-of-step acceleration is stale once the force law changes
+    if force_key(sim) != bodies.force_key:
+        bodies.acc_valid = False
+        bodies.force_key = force_key(sim)
+
+    integrator(bodies, dt, accel)
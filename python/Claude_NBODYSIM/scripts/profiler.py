@@ -0,0 +1,150 @@
+# scripts/profiler.py
+"""
+Named phase timers for the frame loop, with Chrome trace export.
+
+    with profiler.phase("draw_trails"):
+        draw_trails(...)
+
+While profiler.enabled is False, phase() hands back one shared no-op
+context manager, so an instrumented phase costs an attribute check and
+a call — well under a microsecond — and end_frame() returns at once.
+
+Enabled, every phase adds its wall time to the current frame's totals
+(per thread: the physics worker times its ticks with the same calls),
+and end_frame() folds those into smoothed per-phase milliseconds for
+the HUD's stacked bar. trace(frames) additionally keeps every phase as
+a complete ("X") trace event for the next `frames` frames, then writes
+them as trace-event JSON — open it in chrome://tracing or Perfetto.
+"""
+import json
+import os
+import threading
+import time
+
+TRACE_DIR = "traces"
+
+# frames captured by one trace
+TRACE_FRAMES = 120
+
+# per-frame smoothing of the HUD numbers
+SMOOTHING = 0.1
+
+
+def new_trace_path():
+    return os.path.join(TRACE_DIR, time.strftime("trace_%Y%m%d_%H%M%S.json"))
+
+
+class _NoPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_PHASE = _NoPhase()
+
+
+class _Phase:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name     = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+        return False
+
+
+class Profiler:
+    """Per-phase frame timings; see module docstring."""
+
+    def __init__(self):
+        self.enabled = False
+        self.origin  = time.perf_counter()
+        self.main    = threading.main_thread().ident
+        self.reset()
+
+    def reset(self):
+        self.frame      = {}      # name -> seconds so far this frame
+        self.ms         = {}      # name -> smoothed milliseconds per frame
+        self.frame_ms   = 0.0     # smoothed wall milliseconds per frame
+        self.order      = []      # main-thread phases, in first-seen order
+        self.background = []      # phases timed on other threads
+        self.last       = None
+        self.events     = None    # trace events while a trace is running
+        self.remaining  = 0
+        self.trace_path = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if not self.enabled:
+            self.reset()
+
+    def phase(self, name):
+        """Context manager timing `name` — a shared no-op while disabled."""
+        if not self.enabled:
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    def add(self, name, start, end):
+        # the physics thread adds while the frame loop swaps self.frame out,
+        # so work on one dict and never assume a key is there
+        frame = self.frame
+        if name not in self.ms:
+            tid = threading.get_ident()
+            (self.order if tid == self.main else self.background).append(name)
+            self.ms[name] = 0.0
+        frame[name] = frame.get(name, 0.0) + (end - start)
+        events = self.events
+        if events is not None:
+            events.append(dict(name=name, ph="X", pid=0, tid=threading.get_ident(),
+                               ts=(start - self.origin) * 1e6, dur=(end - start) * 1e6))
+
+    def end_frame(self):
+        """Call once per drawn frame: folds its phases into the smoothed numbers."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.last is not None:
+            self.frame_ms += SMOOTHING * ((now - self.last) * 1e3 - self.frame_ms)
+        self.last = now
+        frame, self.frame = self.frame, {}
+        for name in list(self.ms):
+            self.ms[name] += SMOOTHING * (frame.get(name, 0.0) * 1e3 - self.ms[name])
+
+        if self.events is not None:
+            self.events.append(dict(name="frame", ph="i", s="p", pid=0,
+                                    tid=threading.get_ident(), ts=(now - self.origin) * 1e6))
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self._write_trace()
+
+    def trace(self, frames=TRACE_FRAMES, path=None):
+        """Record the next `frames` frames as a trace (enables the profiler). Returns the path."""
+        self.enabled = True
+        self.events = []
+        self.remaining = max(1, int(frames))
+        self.trace_path = path or new_trace_path()
+        return self.trace_path
+
+    @property
+    def tracing(self):
+        return self.events is not None
+
+    def _write_trace(self):
+        events, self.events = self.events, None
+        names = {t.ident: t.name for t in threading.enumerate()}
+        meta = [dict(name="thread_name", ph="M", pid=0, tid=tid, args=dict(name=names.get(tid, str(tid))))
+                for tid in sorted({e["tid"] for e in events})]
+        os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+        with open(self.trace_path, "w") as f:
+            json.dump(dict(traceEvents=meta + events, displayTimeUnit="ms"), f)
+
+
+# the one profiler the frame loop and the physics worker share
+profiler = Profiler()
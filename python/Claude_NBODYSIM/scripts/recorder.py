@@ -0,0 +1,195 @@
+# scripts/recorder.py
+"""
+Trajectory recording to memory-mapped columns, and playback from them.
+
+A recording is a directory:
+
+    meta.json     n, dtype, steps per frame, step_dt, scenario
+    static.npz    mass, radius, names, colors, trail_colors
+    time.f64      (capacity,)        sim time of each frame
+    pos.<dtype>   (capacity, n, 3)   positions
+    vel.<dtype>   (capacity, n, 3)   velocities
+    frames.i64    (1,)               frames written so far
+
+The columns are preallocated and grow by doubling, so appending a frame
+is two array copies into mapped pages — the OS writes them out in the
+background. frames.i64 is only bumped once a frame is complete, so a
+reader (or a crash) never sees half a frame.
+
+TrajectoryReader maps the same files read-only: frame(i) hands out
+views straight into the mapping, and seek() is a binary search on the
+time column, so scrubbing through hours of recording costs nothing
+that depends on its length.
+"""
+import json
+import os
+import time
+from dataclasses import replace
+import numpy as np
+
+from scripts.body import BodyStore
+
+RECORD_DIR = "recordings"
+
+# physics steps per recorded frame (8 steps of 1/480 = 60 frames per sim second)
+RECORD_EVERY = 8
+
+# frames preallocated by a new recording
+INITIAL_FRAMES = 1024
+
+
+def new_recording_path():
+    return os.path.join(RECORD_DIR, time.strftime("rec_%Y%m%d_%H%M%S"))
+
+def latest_recording():
+    """Most recent recording directory, or None."""
+    if not os.path.isdir(RECORD_DIR):
+        return None
+    runs = sorted(d for d in os.listdir(RECORD_DIR)
+                  if os.path.exists(os.path.join(RECORD_DIR, d, "meta.json")))
+    return os.path.join(RECORD_DIR, runs[-1]) if runs else None
+
+
+def _column(path, dtype, shape, mode):
+    return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+
+class TrajectoryRecorder:
+    """Appends every `every`-th step of a BodyStore to a recording directory."""
+
+    def __init__(self, path, bodies, every=RECORD_EVERY, step_dt=None, scenario=None,
+                 capacity=INITIAL_FRAMES, dtype=np.float32):
+        os.makedirs(path, exist_ok=True)
+        self.path   = path
+        self.n      = len(bodies)
+        self.every  = max(1, int(every))
+        self.dtype  = np.dtype(dtype)
+        self.steps  = 0
+        self.frames = 0
+
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump(dict(n=self.n, dtype=self.dtype.name, every=self.every,
+                           step_dt=step_dt, scenario=scenario), f, indent=2)
+        np.savez(os.path.join(path, "static.npz"), mass=bodies.mass, radius=bodies.radius,
+                 names=np.array(bodies.names, dtype=str),
+                 colors=np.array(bodies.colors, dtype=np.uint8).reshape(-1, 4),
+                 trail_colors=np.array(bodies.trail_colors, dtype=np.uint8).reshape(-1, 4))
+
+        self.count = _column(os.path.join(path, "frames.i64"), np.int64, (1,), "w+")
+        self.capacity = 0
+        self._map(capacity)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _map(self, capacity):
+        # (re)size the column files, then map them
+        frame = self.n * 3 * self.dtype.itemsize
+        for name, nbytes in ((f"pos.{self.dtype.name}", frame), (f"vel.{self.dtype.name}", frame),
+                             ("time.f64", 8)):
+            with open(self._file(name), "ab") as f:
+                f.truncate(capacity * nbytes)
+        self.time = _column(self._file("time.f64"), np.float64, (capacity,), "r+")
+        self.pos  = _column(self._file(f"pos.{self.dtype.name}"), self.dtype, (capacity, self.n, 3), "r+")
+        self.vel  = _column(self._file(f"vel.{self.dtype.name}"), self.dtype, (capacity, self.n, 3), "r+")
+        self.capacity = capacity
+
+    def on_step(self, sim_time, pos, vel):
+        """Call after every physics step; records one frame every `every` steps."""
+        self.steps += 1
+        if (self.steps - 1) % self.every == 0:
+            self.append(sim_time, pos, vel)
+
+    def append(self, sim_time, pos, vel):
+        f = self.frames
+        if f == self.capacity:
+            self.flush()
+            self._map(2 * self.capacity)
+        self.time[f] = sim_time
+        self.pos[f]  = pos
+        self.vel[f]  = vel
+        self.frames  = self.count[0] = f + 1
+
+    def flush(self):
+        for column in (self.time, self.pos, self.vel, self.count):
+            column.flush()
+
+    def close(self):
+        self.flush()
+        self.time = self.pos = self.vel = self.count = None
+
+
+class TrajectoryReader:
+    """Read-only, zero-copy access to a recording."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        with np.load(os.path.join(path, "static.npz")) as s:
+            self.static = {k: s[k] for k in s.files}
+
+        n, dtype = self.meta["n"], np.dtype(self.meta["dtype"])
+        frames = int(np.fromfile(os.path.join(path, "frames.i64"), dtype=np.int64, count=1)[0])
+        # a recording may have been cut off mid-grow, trust the shortest column
+        frame_bytes = n * 3 * dtype.itemsize
+        capacity = min(os.path.getsize(os.path.join(path, f"pos.{dtype.name}")) // frame_bytes,
+                       os.path.getsize(os.path.join(path, f"vel.{dtype.name}")) // frame_bytes,
+                       os.path.getsize(os.path.join(path, "time.f64")) // 8)
+        self.frames = min(frames, capacity)
+
+        self.time = _column(os.path.join(path, "time.f64"), np.float64, (capacity,), "r")[:self.frames]
+        self.pos  = _column(os.path.join(path, f"pos.{dtype.name}"), dtype, (capacity, n, 3), "r")
+        self.vel  = _column(os.path.join(path, f"vel.{dtype.name}"), dtype, (capacity, n, 3), "r")
+
+    def __len__(self):
+        return self.frames
+
+    def frame(self, i):
+        """(time, pos, vel) of frame i, the arrays as views into the file."""
+        return float(self.time[i]), self.pos[i], self.vel[i]
+
+    def seek(self, sim_time):
+        """Index of the last frame at or before sim_time (clamped to the recording)."""
+        i = int(np.searchsorted(self.time, sim_time, side="right")) - 1
+        return min(max(i, 0), self.frames - 1)
+
+    def bodies(self):
+        """A BodyStore for drawing frames; its pos / vel get pointed at the mapping."""
+        s = self.static
+        return BodyStore(self.pos[0], self.vel[0], s["mass"], s["radius"], s["names"].tolist(),
+                         [tuple(c) for c in s["colors"].tolist()],
+                         [tuple(c) for c in s["trail_colors"].tolist()],
+                         dtype=self.pos.dtype)
+
+
+class Player:
+    """Plays a recording back through the normal renderer, without physics."""
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.store  = reader.bodies()
+        self.start, self.end = float(reader.time[0]), float(reader.time[-1])
+        self.t      = self.start
+        self.rate   = 1.0      # sim seconds per wall second
+        self.paused = False
+
+    @property
+    def progress(self):
+        return (self.t - self.start) / max(self.end - self.start, 1e-12)
+
+    def advance(self, wall_dt):
+        if not self.paused:
+            self.t = min(self.t + wall_dt * self.rate, self.end)
+
+    def seek(self, sim_time):
+        self.t = min(max(sim_time, self.start), self.end)
+        self.store.trails = None    # a jump would draw a line across the scene
+
+    def sync(self, state):
+        """Point state.bodies at the current frame — no copy, and nothing is stepped."""
+        t, pos, vel = self.reader.frame(self.reader.seek(self.t))
+        self.store.pos, self.store.vel = pos, vel
+        self.store.arrows = None
+        state.bodies = self.store
+        state.sim = replace(state.sim, simulation_time=t, is_paused=self.paused, is_turbo=False)
@@ -1,12 +1,41 @@
 # scripts/render.py
 import pyray as rl
-import math
+import numpy as np
 from utils.colors import *
-from utils.vector3D import Vector3D
-
-# convert to raylib vector for drawing
-def to_rl(v):
-    return rl.Vector3(v.x, v.y, v.z)
+from scripts.trail_mesh import TrailMesh
+from scripts.body_mesh  import BodyMesh, DISC_LODS
+from scripts.arrow_mesh import ArrowMesh
+from scripts.arrows     import RESULTANT
+from scripts.links      import GravityLinks
+from scripts.mesh_batch import MeshBatch
+from utils.labels       import FONT_SIZE
+
+# GPU buffers reused every frame
+_trail_mesh = TrailMesh()
+_body_mesh  = BodyMesh()
+_arrow_mesh = ArrowMesh()
+_link_mesh  = MeshBatch()
+_links      = GravityLinks()
+
+# bodies drawn smaller than this (in pixels) get no label
+LABEL_MIN_PIXELS = DISC_LODS[0][0]
+
+# "F" labels on force arrows only up to this many bodies
+FORCE_LABEL_MAX = 32
+
+_rgba_cache = {}
+
+def rgba_array(colors, slot):
+    """
+    (n, 4) uint8 array for a list of RGBA tuples. Cached per slot until a
+    different or resized list is passed — converting 50k tuples every
+    frame would cost more than drawing them.
+    """
+    cached = _rgba_cache.get(slot)
+    if cached is None or cached[0] is not colors or len(cached[1]) != len(colors):
+        cached = (colors, np.array(colors, dtype=np.uint8).reshape(-1, 4))
+        _rgba_cache[slot] = cached
+    return cached[1]
 
 def draw_grid():
     rl.draw_grid(100, 10)
@@ -16,58 +45,34 @@ def draw_axes(queue_label, camera):
     rl.draw_line_3d(rl.Vector3(0, 0, 0), rl.Vector3(0, 100, 0), Y_AXIS_COLOR); queue_label(rl.Vector3(0, 100, 0), "Y", camera)
     rl.draw_line_3d(rl.Vector3(0, 0, 0), rl.Vector3(0, 0, 100), Z_AXIS_COLOR); queue_label(rl.Vector3(0, 0, 100), "Z", camera)
 
-def draw_trails(bodies):
-    for body in bodies:
-        for i in range(len(body.trail) - 1):
-            start = body.trail[i]
-            end   = body.trail[i + 1]
-            rl.draw_line_3d(to_rl(start), to_rl(end), body.trail_color)
-
-def draw_gravity_lines(bodies):
-    for i, b1 in enumerate(bodies):
-        for b2 in bodies[i+1:]:
-            rl.draw_line_3d(to_rl(b1.position), to_rl(b2.position), GRID_COLOR)
-
-def draw_bodies(bodies, queue_label, camera):
-    for i, body in enumerate(bodies):
-        rl.draw_sphere(to_rl(body.position), body.radius, body.color)
-        queue_label(to_rl(body.position), f"body {i}", camera)
-
-def draw_force_vectors(bodies, queue_label, camera):
-    for i, body in enumerate(bodies):
-        total = Vector3D(0, 0, 0)
-        
-        for force, ref in body.forces:
-            force_direction = force.normalize()
-            offset_origin = body.position + force_direction * body.radius
-            scaled = force_direction * (math.log1p(force.length()) * 3)
-
-            draw_arrow(offset_origin, scaled, ref.color)
-            total += force
-        
-        total_direction = total.normalize()
-        scaled_total = total_direction * (math.log1p(total.length()) * 3)
-        offset_origin = body.position + total_direction * body.radius
-        draw_arrow(offset_origin, scaled_total, RESULTANT_COL)
-        queue_label(to_rl(body.position), "F", camera)
-
-def draw_arrow(origin, vec, color, shaft_r=0.045, head_r=0.13, head_ratio=0.22):
-
-    direction = vec.normalize()
-    length = vec.length()
-    if length < 1e-6:
+def draw_trails(bodies, fade=True):
+    _trail_mesh.draw(bodies.trails, rgba_array(bodies.trail_colors, "trail"), fade)
+
+def draw_gravity_lines(bodies, mode="strongest", k=2, threshold=0.0, refresh_hz=4.0, now=None):
+    # only the links picked by scripts/links.py, re-picked at refresh_hz (now = seconds);
+    # with a PhysicsWorker they arrive ready-picked in bodies.links
+    pairs = bodies.links
+    if pairs is None:
+        pairs = _links.update(bodies, mode, k, threshold, refresh_hz, now)
+    color = (GRID_COLOR.r, GRID_COLOR.g, GRID_COLOR.b, GRID_COLOR.a)
+    _link_mesh.draw_segments(bodies.pos[pairs[:, 0]], bodies.pos[pairs[:, 1]], color)
+
+def draw_bodies(bodies, queue_labels, camera):
+    visible, r_px = _body_mesh.draw(bodies.pos, bodies.radius, rgba_array(bodies.colors, "body"),
+                                    camera, rl.get_screen_width(), rl.get_screen_height())
+    # bigger on screen = labelled first when labels collide
+    big = r_px >= LABEL_MIN_PIXELS
+    queue_labels(bodies.pos[visible[big]], [f"body {i}" for i in visible[big]], camera, r_px[big])
+
+def draw_force_vectors(bodies, queue_labels, camera):
+    # arrows come ready-made from the physics step (bodies.arrows, see scripts/arrows.py)
+    if bodies.arrows is None:
         return
-
-    shaft_end = origin + direction * (length * (1 - head_ratio))
-    tip       = origin + vec
-
-    rl.draw_cylinder_ex(to_rl(origin), to_rl(shaft_end), shaft_r, shaft_r, 12, color)
-    rl.draw_cylinder_ex(to_rl(shaft_end), to_rl(tip), head_r, 0.0, 12, color)
-
-
-
-
-
-
-
-    
+    resultant = (RESULTANT_COL.r, RESULTANT_COL.g, RESULTANT_COL.b, RESULTANT_COL.a)
+    palette = np.vstack((rgba_array(bodies.colors, "body"), np.array([resultant], dtype=np.uint8)))
+    _arrow_mesh.draw(bodies.arrows, palette)
+
+    if len(bodies) <= FORCE_LABEL_MAX:
+        owners = bodies.arrows.owner[bodies.arrows.color == RESULTANT]
+        # one line below the body's own label
+        queue_labels(bodies.pos[owners], ["F"] * len(owners), camera, offset=(0, FONT_SIZE))
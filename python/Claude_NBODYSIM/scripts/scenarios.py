@@ -0,0 +1,87 @@
+# scripts/scenarios.py
+"""
+Named initial conditions.
+
+Every scenario is fn(n, rng, G) -> BodyStore, so the interactive app,
+the headless runner and batch sweeps all build identical systems from
+(name, n, seed). n is ignored by fixed scenarios like "default".
+"""
+import numpy as np
+from scripts.body import Body, BodyStore
+
+
+def default_system(n, rng, G):
+    """The original three bodies, starting at rest."""
+    return Body.create_all()
+
+
+def plummer_sphere(n, rng, G, total_mass=6000.0, scale=50.0):
+    """
+    Plummer model in equilibrium (Aarseth, Hénon & Wielen 1974):
+    radii from the cumulative mass profile, speeds by rejection
+    sampling from the distribution function.
+    """
+    n = n or 1000
+    # radius: M(<r) / M = r^3 / (r^2 + a^2)^(3/2), inverted
+    x = rng.uniform(1e-3, 0.999, n)
+    r = scale / np.sqrt(x ** (-2.0 / 3.0) - 1.0)
+    pos = _random_directions(rng, n) * r[:, None]
+
+    # speed as a fraction q of the local escape speed, g(q) = q^2 (1 - q^2)^3.5
+    q = np.empty(n)
+    todo = np.arange(n)
+    while len(todo):
+        qq = rng.uniform(0.0, 1.0, len(todo))
+        ok = rng.uniform(0.0, 0.1, len(todo)) < qq ** 2 * (1.0 - qq ** 2) ** 3.5
+        q[todo[ok]] = qq[ok]
+        todo = todo[~ok]
+    v_esc = np.sqrt(2.0 * G * total_mass / np.sqrt(r ** 2 + scale ** 2))
+    vel = _random_directions(rng, n) * (q * v_esc)[:, None]
+
+    # remove net drift so the cluster stays where the camera is
+    mass = np.full(n, total_mass / n)
+    pos -= np.average(pos, axis=0, weights=mass)
+    vel -= np.average(vel, axis=0, weights=mass)
+    return BodyStore(pos, vel, mass, np.full(n, 1.0))
+
+
+def rotating_disk(n, rng, G, central_mass=3000.0, disk_mass=3000.0, r_in=20.0, r_out=150.0):
+    """A central body with a thin disk of bodies on near-circular orbits."""
+    n = n or 1000
+    r     = np.sqrt(rng.uniform(r_in ** 2, r_out ** 2, n - 1))
+    phi   = rng.uniform(0.0, 2.0 * np.pi, n - 1)
+    z     = rng.normal(0.0, 0.02 * r_out, n - 1)
+    m     = np.full(n - 1, disk_mass / max(n - 1, 1))
+
+    # circular speed from the central body plus the disk mass inside r
+    inside = np.argsort(np.argsort(r)) * m
+    v = np.sqrt(G * (central_mass + inside) / r)
+
+    pos  = np.column_stack((r * np.cos(phi), z, r * np.sin(phi)))
+    vel  = np.column_stack((-v * np.sin(phi), np.zeros(n - 1), v * np.cos(phi)))
+    pos  = np.vstack(([0.0, 0.0, 0.0], pos))
+    vel  = np.vstack(([0.0, 0.0, 0.0], vel))
+    mass = np.concatenate(([central_mass], m))
+    radius = np.concatenate(([10.0], np.full(n - 1, 1.0)))
+    return BodyStore(pos, vel, mass, radius)
+
+
+def _random_directions(rng, n):
+    v = rng.normal(size=(n, 3))
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+SCENARIOS = {
+    "default" : default_system,
+    "plummer" : plummer_sphere,
+    "disk"    : rotating_disk,
+}
+
+
+def build_scenario(name="default", n=None, seed=0, G=0.01, dtype=np.float64):
+    """Build the named scenario's BodyStore, reproducibly from seed."""
+    bodies = SCENARIOS[name](n, np.random.default_rng(seed), G)
+    if bodies.dtype != dtype:
+        bodies = BodyStore(bodies.pos, bodies.vel, bodies.mass, bodies.radius,
+                           bodies.names, bodies.colors, bodies.trail_colors, dtype=dtype)
+    return bodies
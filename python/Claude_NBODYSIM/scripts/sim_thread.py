@@ -0,0 +1,438 @@
+# scripts/sim_thread.py
+"""
+Physics on its own thread, decoupled from the render loop.
+
+The worker owns the BodyStore being integrated and the SimulationState
+driving it. Every tick it runs the whole steps its Governor allows,
+then publishes an immutable Snapshot (copies of the body arrays,
+read-only) into a double buffer: the render loop only ever sees the
+two newest, and interpolates positions between them for the current
+wall time. A slow frame no longer starves physics, and
+a slow step no longer stalls drawing — the render keeps showing the
+last two snapshots until the next one lands.
+
+Gravity links for the overlay are picked here too (scripts/links.py),
+after a tick and at most at the link refresh rate, and published with
+the Snapshot — at 50k bodies a pick takes long enough to hitch a frame.
+
+Nothing flows the other way except commands (see SimState.apply):
+scripts/input.py sends them through state.send(), and the worker
+drains its queue at the start of every tick.
+
+An exception on the worker (a backend failing, a bad "set" value, a
+full disk under the recorder) doesn't end the thread: the worker
+pauses, keeps the exception in .error and sync() puts it on the HUD.
+Unpausing, reset or restore clears it and carries on.
+
+numpy releases the GIL in the heavy array work and raylib releases it
+in every C call, so a thread is enough to overlap the two loops.
+"""
+import queue
+import threading
+import time
+import traceback
+from dataclasses import dataclass, replace
+import numpy as np
+
+from scripts.body    import BodyStore
+from scripts.trails  import TrailBuffer
+from scripts.physics import sim_step, update_arrows
+from scripts.links   import GravityLinks
+from scripts.recorder import TrajectoryRecorder
+from scripts.diagnostics import Diagnostics
+from scripts.profiler import profiler
+
+# physics ticks per wall second while running
+TICK_HZ = 120
+
+# share of each tick the governor may spend stepping
+TICK_BUDGET = 0.8
+
+# owed sim time carried into later ticks, in wall seconds at the current
+# time scale; anything beyond it is dropped (and counted) instead of
+# being caught up, so a slow machine can't fall into a spiral
+MAX_BACKLOG = 0.25
+
+# in turbo the worker steps flat out, publishing about this often
+TURBO_PUBLISH_HZ = 20
+
+# seconds of wall time the sim-seconds-per-second rate is smoothed over
+RATE_WINDOW = 0.5
+
+
+class Governor:
+    """
+    Fixed-timestep accumulator with a work budget.
+
+    Wall time * time_scale is banked as owed sim time and paid off in
+    whole steps of sim.step_dt, so the trajectory is the same sequence
+    of identical steps whatever the tick or frame rate. How many steps a
+    tick may take comes from the measured cost of one step and the
+    budget; the rest stays owed, up to the backlog cap.
+    """
+
+    def __init__(self, budget=TICK_BUDGET / TICK_HZ, backlog=MAX_BACKLOG):
+        self.budget  = budget    # wall seconds of stepping per tick
+        self.backlog = backlog
+        self.reset()
+
+    def reset(self):
+        self.owed  = 0.0     # sim time not stepped yet
+        self.cost  = None    # smoothed wall seconds per step
+        self.steps = 0       # steps planned last tick
+
+    def plan(self, real_dt, time_scale, step_dt):
+        """(steps to take now, sim time dropped) after real_dt wall seconds."""
+        self.owed += real_dt * time_scale
+        due = int(self.owed / step_dt + 1e-9)
+        # one step until there is a measurement to budget with
+        allowed = 1 if self.cost is None else max(1, int(self.budget / self.cost))
+        self.steps = min(due, allowed)
+        self.owed -= self.steps * step_dt
+
+        cap = max(self.backlog * time_scale, step_dt)
+        dropped = max(self.owed - cap, 0.0)
+        self.owed -= dropped
+        return self.steps, dropped
+
+    def plan_flat_out(self, budget):
+        """Steps filling `budget` wall seconds, with nothing owed or dropped (turbo)."""
+        self.owed  = 0.0
+        self.steps = 1 if self.cost is None else max(1, int(budget / self.cost))
+        return self.steps
+
+    def record(self, steps, elapsed):
+        """Feed back how long the planned steps really took."""
+        if steps:
+            per_step  = elapsed / steps
+            self.cost = per_step if self.cost is None else self.cost + 0.2 * (per_step - self.cost)
+
+
+@dataclass(frozen=True)
+class Layout:
+    """What only changes with the body set, shared by every Snapshot of a generation."""
+    names        : tuple
+    colors       : tuple
+    trail_colors : tuple
+    trails       : TrailBuffer   # handed to the render side (None: it starts its own)
+    ids          : np.ndarray    # BodyStore.ids
+    merged_into  : np.ndarray    # BodyStore.merged_into
+    source       : object        # the physics BodyStore; the same one after mergers
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    generation : int          # bumped whenever the body set changes (reset, restore, mergers)
+    step       : int          # physics steps taken so far
+    wall       : float        # time.perf_counter() when published
+    time       : float        # simulation time
+    pos        : np.ndarray   # read-only copies of the body arrays
+    vel        : np.ndarray
+    acc        : np.ndarray
+    mass       : np.ndarray
+    radius     : np.ndarray
+    arrows     : object       # ArrowSet or None
+    links      : np.ndarray   # (m, 2) gravity-link pairs, empty while links are hidden
+    G          : float
+    softening  : float
+    sim        : object       # SimulationState copy
+    layout     : Layout
+
+
+def _frozen(a):
+    a = a.copy()
+    a.setflags(write=False)
+    return a
+
+
+class PhysicsWorker:
+
+    def __init__(self, state):
+        """Take over state.bodies / state.sim; state keeps a render-side view of them."""
+        # the physics side is a shallow copy sharing the original bodies and sim
+        self.physics = state.__class__.__new__(state.__class__)
+        self.physics.__dict__.update(state.__dict__)
+        self.physics.camera = self.physics.input = self.physics.render = None
+        self.physics.worker = None
+
+        self.commands    = queue.Queue()
+        self.governor    = Governor()
+        self.emit_arrows = False
+        self.focus       = ()
+        self.link_view   = None  # (mode, k, threshold, refresh_hz) while links are shown
+        self.links       = GravityLinks()
+        self.generation  = 0
+        self.steps       = 0
+        self.rate        = 0.0   # achieved sim seconds per wall second
+        self.recorder    = None  # TrajectoryRecorder while recording
+        self.diagnostics = Diagnostics()
+        self.error       = None  # the exception that last paused physics
+        self._reported   = None
+        self.layout      = None
+        self._layout_of  = None
+        self._view_sent  = None
+        self._lock       = threading.Lock()
+        self._stop       = threading.Event()
+        self._thread     = None
+        self._bodies     = None
+        self._synced     = -1
+        self._source     = None
+
+        first = self._publish(time.perf_counter())
+        self._snaps = (first, first)
+        state.worker = self
+        self.sync(state, first.wall)
+
+    # ------------------------------------------------- worker thread ---
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="physics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.commands.put(None)   # wake a paused worker
+        if self._thread is not None:
+            self._thread.join()
+        self._record(None)
+
+    def send(self, command):
+        self.commands.put(command)
+
+    def set_view(self, emit_arrows, focus, links=None):
+        """What the renderer wants arrows and links for; only sent when it changes."""
+        view = (bool(emit_arrows), tuple(focus), links)
+        if view != self._view_sent:
+            self._view_sent = view
+            self.send(("view", *view))
+
+    def _apply(self, command):
+        name = command[0]
+        if name == "view":
+            self.emit_arrows, self.focus, self.link_view = command[1], command[2], command[3]
+            self.physics.bodies.arrows = None
+        elif name == "record":
+            self._record(command[1])
+        else:
+            self.physics.apply(command)
+            if command == ("set", "is_paused", False) or name in ("reset", "restore"):
+                self.error = None
+            if name in ("reset", "restore"):
+                # a recording holds one body set
+                self._record(None)
+                self.governor.reset()
+                self.diagnostics.reset()
+
+    def _record(self, path):
+        """Start recording to path, or stop with None."""
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+        if path is not None:
+            p = self.physics
+            self.recorder = TrajectoryRecorder(path, p.bodies, step_dt=p.sim.step_dt,
+                                               scenario=list(p.scenario))
+
+    def _drain(self, timeout=None):
+        """Apply every queued command, waiting up to timeout for the first one."""
+        applied = 0
+        try:
+            command = self.commands.get(timeout=timeout) if timeout else self.commands.get_nowait()
+            while True:
+                if command is not None:
+                    self._apply(command)
+                    applied += 1
+                command = self.commands.get_nowait()
+        except queue.Empty:
+            pass
+        return applied
+
+    def _run(self):
+        self._last = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                self._cycle()
+            except Exception as e:
+                self._fail(e)
+
+    def _cycle(self):
+        if self.physics.sim.is_paused:
+            # nothing moves: sleep until a command arrives
+            changed = self._drain(timeout=0.1)
+            self._last = time.perf_counter()
+            if changed:
+                self._refresh_arrows()
+                self._push(self._publish(self._last))
+            return
+
+        changed = self._drain()
+        now = time.perf_counter()
+        real_dt, self._last = now - self._last, now
+        if self._tick(real_dt) or changed:
+            self._refresh_arrows()
+            with profiler.phase("publish"):
+                self._push(self._publish(time.perf_counter()))
+
+        if self.physics.sim.is_turbo:
+            return    # flat out, no waiting for the next tick
+        wait = 1.0 / TICK_HZ - (time.perf_counter() - now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _fail(self, error):
+        """Pause on an exception and keep it for the render side, instead of dying silently."""
+        traceback.print_exception(error)
+        self.error = error
+        self.physics.sim.is_paused = True
+        recorder, self.recorder = self.recorder, None
+        try:
+            if recorder is not None:
+                recorder.close()
+        except Exception:
+            pass    # the recorder may be what failed
+        try:
+            # let the render side see the pause
+            self._push(self._publish(time.perf_counter()))
+        except Exception:
+            pass
+
+    def _tick(self, real_dt):
+        """Advance by the whole steps the governor allows; returns how many."""
+        sim, bodies = self.physics.sim, self.physics.bodies
+        if sim.is_paused:
+            return 0
+        if sim.is_turbo:
+            # as many steps as the CPU allows, whatever the time scale
+            steps = self.governor.plan_flat_out(1.0 / TURBO_PUBLISH_HZ)
+        else:
+            steps, dropped = self.governor.plan(real_dt, sim.time_scale, sim.step_dt)
+            sim.dropped_time += dropped
+
+        start = time.perf_counter()
+        # timed per tick, not per step: turbo takes thousands of steps a second
+        with profiler.phase("sim_step"):
+            for k in range(steps):
+                last = k == steps - 1
+                sim_step(bodies, sim.step_dt, sim, emit_arrows=last and self.emit_arrows, focus=self.focus)
+                sim.simulation_time += sim.step_dt
+                if self.recorder is not None and self.recorder.n != len(bodies):
+                    self._record(None)     # bodies merged, a recording holds one body set
+                if self.recorder is not None:
+                    self.recorder.on_step(sim.simulation_time, bodies.pos, bodies.vel)
+                self.diagnostics.on_step(bodies, sim, self.steps + k + 1)
+        self.governor.record(steps, time.perf_counter() - start)
+        self.steps += steps
+        return steps
+
+    def _refresh_arrows(self):
+        # vectors just switched on, focus changed or reset
+        bodies = self.physics.bodies
+        if self.emit_arrows and bodies.arrows is None:
+            update_arrows(bodies, self.physics.sim, self.focus)
+
+    def _publish(self, wall):
+        bodies, sim = self.physics.bodies, self.physics.sim
+        if self._layout_of is not bodies or len(self.layout.ids) != len(bodies):
+            # a new body set (first publish, reset, restore) or bodies merged
+            if self.layout is not None:
+                self.generation += 1
+            self.layout = Layout(tuple(bodies.names), tuple(bodies.colors), tuple(bodies.trail_colors),
+                                 bodies.trails if bodies.has_trails else None,
+                                 bodies.ids.copy(), bodies.merged_into, bodies)
+            # the render side owns the trails from here on
+            bodies.trails   = None
+            self._layout_of = bodies
+        return Snapshot(
+            generation = self.generation,
+            step       = self.steps,
+            wall       = wall,
+            time       = sim.simulation_time,
+            pos        = _frozen(bodies.pos),
+            vel        = _frozen(bodies.vel),
+            acc        = _frozen(bodies.acc),
+            mass       = _frozen(bodies.mass),
+            radius     = _frozen(bodies.radius),
+            arrows     = bodies.arrows,
+            links      = self._pick_links(bodies, wall),
+            G          = bodies.G or sim.gravity_constant,
+            softening  = bodies.softening or sim.softening,
+            sim        = replace(sim),
+            layout     = self.layout,
+        )
+
+    def _pick_links(self, bodies, wall):
+        if self.link_view is None:
+            return np.zeros((0, 2), dtype=np.int64)
+        mode, k, threshold, refresh_hz = self.link_view
+        return self.links.update(bodies, mode, k, threshold, refresh_hz, wall)
+
+    def _push(self, snap):
+        prev = self._snaps[1]
+        span = snap.wall - prev.wall
+        if snap.generation == prev.generation and span > 0:
+            w = min(span / RATE_WINDOW, 1.0)
+            self.rate += w * ((snap.time - prev.time) / span - self.rate)
+        with self._lock:
+            self._snaps = (self._snaps[1], snap)
+
+    def latest(self):
+        """The two newest snapshots, oldest first."""
+        with self._lock:
+            return self._snaps
+
+    # ------------------------------------------------- render thread ---
+    def sync(self, state, now=None):
+        """
+        Point state.bodies / state.sim at the newest physics, with positions
+        interpolated between the last two snapshots for wall time `now`.
+        Drawing then lags physics by at most one tick, and never jumps.
+        """
+        now = time.perf_counter() if now is None else now
+        prev, curr = self.latest()
+
+        error = self.error
+        if error is not None and error is not self._reported:
+            self._reported = error
+            state.notify(f"physics paused by {type(error).__name__}: {error}")
+
+        view = self._bodies
+        if view is None or self._synced != curr.generation:
+            lay  = curr.layout
+            old  = view
+            view = BodyStore(curr.pos, curr.vel, curr.mass, curr.radius,
+                             lay.names, lay.colors, lay.trail_colors, dtype=curr.pos.dtype)
+            view.ids, view.merged_into = lay.ids, lay.merged_into
+            if old is not None and lay.source is self._source:
+                # same body set after mergers: keep the survivors' trails
+                if old.has_trails:
+                    view.trails = old.trails
+                    view.trails.keep(np.searchsorted(old.ids, lay.ids))
+            else:
+                view.trails = lay.trails
+            self._bodies, self._synced, self._source = view, curr.generation, lay.source
+
+        span = curr.wall - prev.wall
+        if prev.generation != curr.generation or span <= 0:
+            alpha = 1.0
+        else:
+            alpha = min(max((now - curr.wall) / span, 0.0), 1.0)
+
+        if alpha < 1.0:
+            np.subtract(curr.pos, prev.pos, out=view.pos)
+            view.pos *= alpha
+            view.pos += prev.pos
+        else:
+            view.pos[:] = curr.pos
+        view.vel[:], view.acc[:] = curr.vel, curr.acc
+        view.G, view.softening = curr.G, curr.softening
+
+        arrows = curr.arrows
+        if arrows is not None and alpha < 1.0:
+            # arrows were built at curr's positions, move them with the bodies
+            shift = (view.pos - curr.pos)[arrows.owner]
+            arrows = replace(arrows, origin=arrows.origin + shift.astype(arrows.origin.dtype))
+        view.arrows = arrows
+        view.links  = curr.links
+
+        state.bodies = view
+        state.sim    = replace(curr.sim, simulation_time=prev.time + alpha * (curr.time - prev.time))
+        return curr
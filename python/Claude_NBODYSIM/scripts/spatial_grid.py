@@ -0,0 +1,78 @@
+# scripts/spatial_grid.py
+"""
+Uniform-grid spatial hash over body positions.
+
+Bodies are binned into cubic cells of side `cell` and sorted by cell
+key, so every occupied cell owns one contiguous run of the sorted
+arrays. neighbour_pairs() returns every pair of bodies in the same or
+adjacent cells — each unordered pair exactly once — which is the
+candidate set for anything that only cares about bodies closer than
+one cell (collisions, nearest links).
+
+Everything is vectorized per cell offset (14 of them), never per body.
+"""
+import numpy as np
+from scripts.octree import _expand_ranges
+
+# cells per axis are capped so the packed key can't overflow int64
+MAX_CELLS = 1 << 20
+
+# the 13 neighbour offsets "after" (0, 0, 0) — with the cell itself
+# these visit every adjacent pair of cells once
+_FORWARD = [(dx, dy, dz)
+            for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+            if (dx, dy, dz) > (0, 0, 0)]
+
+
+class SpatialGrid:
+
+    def __init__(self, pos, cell):
+        n = len(pos)
+        lo = pos.min(axis=0) if n else np.zeros(3)
+        span = float((pos.max(axis=0) - lo).max()) if n else 0.0
+        self.cell = max(float(cell), span / MAX_CELLS, 1e-12)
+
+        ijk = ((pos - lo) / self.cell).astype(np.int64) + 1     # +1: a free layer for offsets
+        self.dims = ijk.max(axis=0) + 2 if n else np.ones(3, dtype=np.int64)
+        keys = self._key(ijk)
+
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.keys, self.start, self.count = np.unique(sorted_keys, return_index=True, return_counts=True)
+        # for every sorted body: which occupied cell it sits in
+        self.slot = np.repeat(np.arange(len(self.keys)), self.count)
+
+    def _key(self, ijk):
+        return (ijk[..., 0] * self.dims[1] + ijk[..., 1]) * self.dims[2] + ijk[..., 2]
+
+    def neighbour_pairs(self):
+        """(i, j) index arrays of every pair in the same or adjacent cells."""
+        n = len(self.order)
+        if n < 2:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        rank = np.arange(n)
+        pi, pj = [], []
+
+        # same cell: every later body in the run
+        ends = self.start[self.slot] + self.count[self.slot]
+        counts = ends - rank - 1
+        pi.append(np.repeat(rank, counts))
+        pj.append(_expand_ranges(rank + 1, counts))
+
+        # each occupied cell against its forward neighbours
+        for off in _FORWARD:
+            target = self.keys + self._key(np.array(off))
+            at = np.searchsorted(self.keys, target)
+            at = np.minimum(at, len(self.keys) - 1)
+            hit = np.flatnonzero(self.keys[at] == target)
+            if len(hit) == 0:
+                continue
+            # bodies of cell `hit` x bodies of cell `at[hit]`
+            mine  = _expand_ranges(self.start[hit], self.count[hit])
+            other = at[self.slot[mine]]
+            pi.append(np.repeat(mine, self.count[other]))
+            pj.append(_expand_ranges(self.start[other], self.count[other]))
+
+        i = np.concatenate(pi)
+        j = np.concatenate(pj)
+        return self.order[i], self.order[j]
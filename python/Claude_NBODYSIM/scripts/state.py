@@ -1,26 +1,57 @@
 # scripts/state.py
 
-import pyray as rl
+import time
 from dataclasses import dataclass
-from scripts.camera  import Camera
-from scripts.body    import Body
+from scripts.scenarios import build_scenario
+
+# pyray (and scripts.camera, which needs it) is imported only where a
+# window is involved, so headless runs can use this module without it
 
 
 @dataclass
 class RenderState:
     """Controls what is visible in the scene."""
-    show_trails     : bool = True
-    show_vectors    : bool = True
-    show_components : bool = False
+    show_trails     : bool  = True
+    show_vectors    : bool  = True
+    show_links      : bool  = True
+    link_mode       : str   = "strongest"   # one of links.LINK_MODES
+    link_k          : int   = 2       # links kept per body ("strongest" / "nearest")
+    link_threshold  : float = 0.0     # minimum |F| in "threshold" mode
+    link_hz         : float = 4.0     # how often links are re-picked, 0 = every frame
+    show_components : bool  = True    # pair breakdown of the selected body's net force
+    selected        : int   = 0       # body the camera follows
+    trail_length    : int   = 300     # points kept per body
+    trail_every     : int   = 1       # record a trail point every n frames
+    trail_min_angle : float = 0.0     # degrees; > 0 drops points on near-straight stretches
+    trail_fade      : bool  = True    # alpha fades towards the oldest point
+    hud_rows        : int   = 3       # body rows per HUD page (after the selected body)
+    hud_page        : int   = 0
+    hud_metric      : str   = "index" # body list order, one of hud.HUD_METRICS
+    hud_hz          : float = 5.0     # HUD text refresh rate, 0 = every frame
+    turbo_fps       : float = 10.0    # frames drawn per wall second while in turbo
 
 
 @dataclass
 class SimulationState:
     """Controls how the simulation runs."""
     is_paused        : bool  = False
+    is_turbo         : bool  = False      # fast-forward: step flat out, ignore time_scale
     time_scale       : float = 1.0
     gravity_constant : float = 0.01
     simulation_time  : float = 0.0
+    step_dt          : float = 1.0 / 480  # fixed sim time per physics step
+    dropped_time     : float = 0.0        # sim time skipped when physics couldn't keep up
+    force_backend    : str   = "direct"   # key into physics.FORCE_BACKENDS
+    integrator       : str   = "symplectic_euler"  # one of physics.INTEGRATOR_NAMES
+    block_eta        : float = 0.02       # hermite_block accuracy parameter
+    block_levels     : int   = 10         # hermite_block: finest step is dt / 2^levels
+    theta            : float = 0.7        # Barnes–Hut opening angle
+    softening        : float = 0.1        # Plummer softening length
+    merge_collisions : bool  = False      # touching bodies merge inelastically
+    pm_grid          : int   = 64         # particle-mesh cells per axis
+    workers          : int   = 0          # direct_parallel processes, 0 = every core
+    arrow_pairs_max  : int   = 32         # pair breakdown: every contributor up to this many bodies,
+    arrow_top_k      : int   = 3          # then only the k strongest pulls
 
 @dataclass
 class InputState:
@@ -31,6 +62,7 @@ class InputState:
     def __post_init__(self):
         # previous_mouse needs a live pyray call so we can't set it
         # as a default value above — pyray must be initialized first
+        import pyray as rl
         self.previous_mouse = rl.get_mouse_position()
 
 
@@ -45,17 +77,67 @@ class SimState:
         state.input.is_dragging
         state.camera
         state.bodies
+
+    With a PhysicsWorker attached (scripts/sim_thread.py) bodies and sim
+    are a render-side view refreshed from the worker's snapshots, and
+    changes to the simulation go through send() instead of being made
+    on them directly.
     """
 
-    def __init__(self):
-        """init simulation based on starting variables"""
-        self.camera  = Camera()
-        self.bodies  = Body.create_all()
-        self.render  = RenderState()
-        self.sim     = SimulationState()
-        self.input   = InputState()
+    def __init__(self, scenario="default", n_bodies=None, seed=0, headless=False):
+        """
+        init simulation based on starting variables
+
+        scenario / n_bodies / seed pick the initial conditions (see
+        scripts/scenarios.py). headless skips the camera and input,
+        which need a pyray window.
+        """
+        self.scenario = (scenario, n_bodies, seed)
+        self.sim      = SimulationState()
+        self.bodies   = build_scenario(scenario, n_bodies, seed, self.sim.gravity_constant)
+        self.render   = RenderState()
+        self.worker   = None
+        self.player   = None     # recorder.Player while a recording is played back
+        self.message  = None     # (text, time.monotonic()) shown on the HUD, see notify()
+        if headless:
+            self.camera = None
+            self.input  = None
+        else:
+            from scripts.camera import Camera
+            self.camera = Camera()
+            self.input  = InputState()
 
     def reset(self):
         """Reset simulation back to initial conditions."""
-        self.bodies  = Body.create_all()
         self.sim     = SimulationState()
+        scenario, n_bodies, seed = self.scenario
+        self.bodies  = build_scenario(scenario, n_bodies, seed, self.sim.gravity_constant)
+
+    def notify(self, text):
+        """Show a one-line message on the HUD for a few seconds."""
+        self.message = (text, time.monotonic())
+
+    def send(self, command):
+        """Change the simulation — queued to the physics worker if there is one."""
+        if self.worker is not None:
+            self.worker.send(command)
+        else:
+            self.apply(command)
+
+    def apply(self, command):
+        """
+        Run one command on the physics side:
+            ("reset",)
+            ("set", field, value)   any SimulationState field
+            ("restore", bodies, sim, scenario)   from checkpoint.load_checkpoint
+        """
+        name = command[0]
+        if name == "reset":
+            self.reset()
+        elif name == "restore":
+            _, self.bodies, self.sim, self.scenario = command
+        elif name == "set":
+            _, field, value = command
+            setattr(self.sim, field, value)
+        else:
+            raise ValueError(f"unknown command {name!r}")
@@ -0,0 +1,41 @@
+# scripts/trail_mesh.py
+"""
+All trails drawn as one dynamic mesh.
+
+Every segment goes through MeshBatch.draw_segments, so a frame costs
+two buffer uploads and one draw call, however many bodies and trail
+points there are — instead of one draw_line_3d per segment.
+
+Vertex alpha fades from the body's trail colour at the newest point to
+transparent at the oldest.
+"""
+import numpy as np
+from scripts.mesh_batch import MeshBatch
+
+
+class TrailMesh:
+
+    def __init__(self):
+        self.batch = MeshBatch()
+
+    def draw(self, trails, colors, fade=True):
+        """trails: TrailBuffer, colors: (n, 4) uint8 RGBA per body."""
+        cap = trails.capacity
+        oldest = (trails.head - trails.count) % cap
+
+        # every stored segment k -> k+1, oldest first
+        rows, k = np.nonzero(np.arange(cap - 1) < (trails.count - 1)[:, None])
+        m = len(rows)
+        if m == 0:
+            return
+        a = (oldest[rows] + k) % cap
+        b = (a + 1) % cap
+
+        rgba = colors[rows]
+        end_rgba = rgba.copy()
+        if fade:
+            span = (trails.count[rows] - 1).astype(np.float32)
+            rgba[:, 3]     = rgba[:, 3] * (k / span)
+            end_rgba[:, 3] = end_rgba[:, 3] * ((k + 1) / span)
+
+        self.batch.draw_segments(trails.points[rows, a], trails.points[rows, b], rgba, end_rgba)
@@ -0,0 +1,113 @@
+# scripts/trails.py
+import numpy as np
+
+# keep() slides rows down in place when at most this share of bodies goes
+KEEP_IN_PLACE = 0.25
+
+
+class TrailBuffer:
+    """
+    Fixed-capacity ring buffer holding every body's trail.
+
+        points  (n, capacity, 3)  float32, written in place
+        head    (n,)              next slot each body writes to
+        count   (n,)              how many slots hold a point
+
+    Memory and the cost of push() are constant however long the
+    simulation runs — the oldest point is overwritten once a trail is full.
+
+    push(..., min_angle_deg > 0) drops points that add no visible
+    curvature: when the new point continues the last segment almost
+    straight, the last point is moved forward instead of a new one
+    being stored, so straight stretches cost one segment.
+    """
+
+    def __init__(self, n, capacity=300, every=1):
+        self.capacity = max(2, int(capacity))
+        self.every    = max(1, int(every))
+        self.points   = np.zeros((n, self.capacity, 3), dtype=np.float32)
+        self.head     = np.zeros(n, dtype=np.int64)
+        self.count    = np.zeros(n, dtype=np.int64)
+        self.ticks    = 0
+
+    def __len__(self):
+        return len(self.points)
+
+    def configure(self, capacity, every):
+        """Change trail length / sampling interval, keeping the newest points."""
+        self.every = max(1, int(every))
+        capacity = max(2, int(capacity))
+        if capacity == self.capacity:
+            return
+        keep = min(capacity, self.capacity)
+        points = np.zeros((len(self), capacity, 3), dtype=np.float32)
+        count  = np.minimum(self.count, keep)
+        for i in np.flatnonzero(count):
+            points[i, :count[i]] = self.ordered(i)[-count[i]:]
+        self.points, self.count, self.capacity = points, count, capacity
+        self.head = count % capacity
+
+    def clear(self):
+        self.head[:]  = 0
+        self.count[:] = 0
+        self.ticks    = 0
+
+    def push(self, pos, min_angle_deg=0.0):
+        """Record the current positions (every `every` calls)."""
+        self.ticks += 1
+        if (self.ticks - 1) % self.every:
+            return
+
+        n, cap = len(self), self.capacity
+        rows = np.arange(n)
+        pos  = pos.astype(np.float32, copy=False)
+        write = self.head.copy()
+
+        if min_angle_deg > 0.0:
+            last = self.points[rows, (self.head - 1) % cap]
+            prev = self.points[rows, (self.head - 2) % cap]
+            a, b = last - prev, pos - last
+            na = np.sqrt(np.einsum("ij,ij->i", a, a))
+            nb = np.sqrt(np.einsum("ij,ij->i", b, b))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                cos = np.einsum("ij,ij->i", a, b) / (na * nb)
+            # straight on (or not moved at all): slide the last point instead
+            straight = (self.count >= 2) & ((nb == 0) | (cos > np.cos(np.radians(min_angle_deg))))
+            write[straight] = (self.head[straight] - 1) % cap
+            grow = ~straight
+        else:
+            grow = np.ones(n, dtype=bool)
+
+        self.points[rows, write] = pos
+        self.head  = np.where(grow, (self.head + 1) % cap, self.head)
+        self.count = np.where(grow, np.minimum(self.count + 1, cap), self.count)
+
+    def ordered(self, i):
+        """Body i's trail, oldest point first, as a (count, 3) array."""
+        c, h = int(self.count[i]), int(self.head[i])
+        if c < self.capacity:
+            return self.points[i, :c]
+        return np.concatenate((self.points[i, h:], self.points[i, :h]))
+
+    def keep(self, rows):
+        """Keep only these bodies' trails (sorted rows, after bodies were removed)."""
+        rows = np.asarray(rows)
+        n = len(rows)
+        if 0 < len(self) - n <= KEEP_IN_PLACE * len(self):
+            # a few bodies gone: move each run of survivors down over the gaps,
+            # instead of gathering a whole new (n, capacity, 3) array
+            breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+            for a, b in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [n]))):
+                shift = int(rows[a]) - a
+                if shift == 0:
+                    continue
+                # chunks no longer than the shift never overlap, so numpy copies
+                # them straight across instead of through a temporary
+                for s in range(a, b, shift):
+                    e = min(b, s + shift)
+                    self.points[s:e] = self.points[s + shift:e + shift]
+            self.points = self.points[:n]
+        elif n != len(self):
+            self.points = self.points[rows]
+        self.head   = self.head[rows]
+        self.count  = self.count[rows]
@@ -0,0 +1,36 @@
+# scripts/view.py
+"""
+Camera maths in numpy, for work that has to happen per body.
+
+rl.get_world_to_screen is one FFI call per point; project() does the
+same perspective projection for a whole (n, 3) array at once.
+"""
+import math
+import numpy as np
+
+
+def camera_basis(camera):
+    """eye, forward, right, up (numpy, unit length) for an rl.Camera3D."""
+    eye    = np.array((camera.position.x, camera.position.y, camera.position.z))
+    target = np.array((camera.target.x,   camera.target.y,   camera.target.z))
+    fwd    = target - eye
+    fwd   /= np.linalg.norm(fwd)
+    right  = np.cross(fwd, (camera.up.x, camera.up.y, camera.up.z))
+    right /= np.linalg.norm(right)
+    up     = np.cross(right, fwd)
+    return eye, fwd, right, up
+
+
+def project(points, camera, screen_w, screen_h):
+    """
+    Screen x, y and view depth for every point. Points behind the camera
+    come back with depth <= 0 and meaningless x, y.
+    """
+    eye, fwd, right, up = camera_basis(camera)
+    d     = points - eye
+    depth = d @ fwd
+    tan_v = math.tan(math.radians(camera.fovy) / 2)
+    z     = np.where(depth > 1e-9, depth, 1e-9) * tan_v
+    x = (1.0 + (d @ right) / (z * screen_w / screen_h)) * (screen_w / 2)
+    y = (1.0 - (d @ up) / z) * (screen_h / 2)
+    return x, y, depth
@@ -11,6 +11,7 @@ RESULTANT_COLOR     — color for the combined/resultant force arrow
 
 
 import pyray as rl
+from utils.palette import BODY_RGBA, FORCE_RGBA, TRAIL_RGBA
 
 
 def hex_to_color(hex_str, alpha=255):
@@ -32,19 +33,6 @@ RESULTANT_COL = rl.Color(255, 220,  50, 255)
 WHITE         = rl.Color(255, 255, 255, 255)
 DARK_OVERLAY  = rl.Color(  0,   0,   0, 140)
 
-BODY_COLS = [
-    rl.Color( 70, 140, 230, 255),   # blue
-    rl.Color(220,  80,  80, 255),   # red
-    rl.Color( 55, 200, 120, 255),   # green
-]
-FORCE_COLS = [
-    rl.Color(120, 190, 255, 220),
-    rl.Color(255, 140, 140, 220),
-    rl.Color(120, 240, 170, 220),
-]
-TRAIL_COLS = [
-    rl.Color( 70, 140, 230, 120),
-    rl.Color(220,  80,  80, 120),
-    rl.Color( 55, 200, 120, 120),
-]
-
+BODY_COLS  = [rl.Color(*c) for c in BODY_RGBA]
+FORCE_COLS = [rl.Color(*c) for c in FORCE_RGBA]
+TRAIL_COLS = [rl.Color(*c) for c in TRAIL_RGBA]
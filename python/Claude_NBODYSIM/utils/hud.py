@@ -1,35 +1,245 @@
 # utils/hud.py
+import math
+import time
+import numpy as np
 import pyray as rl
-from utils.colors import DARK_OVERLAY, WHITE, BODY_COLS
+from utils.colors import DARK_OVERLAY, WHITE
+from scripts.profiler import profiler
+from scripts.physics import active_backend
 
 #TODO: placeholder hud, needs to be customized
 
-def draw_hud(state, window_width, window_height):
+# what the body list can be sorted by (largest first, except index)
+HUD_METRICS = ["index", "mass", "speed", "accel"]
+
+# above this many bodies the panel leads with aggregate stats
+AGGREGATE_OVER = 12
+
+ROW_HEIGHT = 80
+LINE       = 16
+
+# energy drift sparkline size in pixels
+SPARK_W = 190
+SPARK_H = 32
+
+# frame-time bar: width in pixels, and the milliseconds that fill it (two 60 Hz frames)
+BAR_W  = 190
+BAR_MS = 2000.0 / 60
+
+# one colour per profiled phase, in the order phases first show up
+PHASE_RGBA = [
+    (230, 160,  60, 255), ( 90, 170, 230, 255), (120, 210, 120, 255), (220,  90,  90, 255),
+    (190, 130, 220, 255), (230, 220,  90, 255), ( 90, 210, 200, 255), (240, 130, 180, 255),
+    (160, 160, 160, 255), (150, 110,  70, 255),
+]
+
+# seconds a SimState.notify() message stays up
+MESSAGE_SECONDS = 4.0
+
+# text is only re-formatted at RenderState.hud_hz; frames in between redraw it
+_cache = dict(time=-math.inf, key=None, title="", summary=[], rows=[], drift=None, spark=[])
+
+
+def body_order(bodies, metric):
+    """Body indices sorted by metric."""
+    if metric == "mass":
+        values = bodies.mass
+    elif metric == "speed":
+        values = np.einsum("ij,ij->i", bodies.vel, bodies.vel)
+    elif metric == "accel":
+        values = np.einsum("ij,ij->i", bodies.acc, bodies.acc)
+    else:
+        return np.arange(len(bodies))
+    return np.argsort(-values, kind="stable")
+
+
+def aggregate_lines(bodies, diag=None):
+    """Summary for large N; energy comes from the last diagnostics sample, if any."""
+    m   = bodies.mass.astype(np.float64)
+    v   = bodies.vel.astype(np.float64)
+    com = (m[:, None] * bodies.pos).sum(axis=0) / m.sum()
+    vcm = (m[:, None] * v).sum(axis=0) / m.sum()
+    lines = [
+        f"count {len(bodies)}   mass {m.sum():.4g}",
+        f"com  x:{com[0]:.1f} y:{com[1]:.1f} z:{com[2]:.1f}",
+        f"vcom x:{vcm[0]:.2f} y:{vcm[1]:.2f} z:{vcm[2]:.2f}",
+    ]
+    if diag is not None:
+        lines.append(f"energy {diag['energy']:.5g}  (KE {diag['kinetic']:.4g})")
+    else:
+        ke = 0.5 * float((m * (v * v).sum(axis=1)).sum())
+        lines.append(f"kinetic {ke:.5g}")
+    return lines
+
+
+def sparkline_points(values, w, h):
+    """values scaled into a w x h box as integer (x, y) points, at most one per pixel column."""
+    values = values[np.isfinite(values)]
+    if len(values) < 2:
+        return []
+    if len(values) > w:
+        values = values[np.linspace(0, len(values) - 1, w).astype(np.int64)]
+    lo, hi = values.min(), values.max()
+    x = np.linspace(0, w, len(values))
+    y = h - (values - lo) / ((hi - lo) or 1.0) * h
+    return list(zip(x.astype(int).tolist(), y.astype(int).tolist()))
+
+
+def body_lines(body):
+    p, v = body.position, body.velocity
+    return [
+        f"pos  x:{p.x:.1f} y:{p.y:.1f} z:{p.z:.1f}",
+        f"vel  x:{v.x:.1f} y:{v.y:.1f} z:{v.z:.1f}",
+        f"mass {body.mass:.2f}  radius {body.radius:.1f}",
+    ]
+
+
+def _refresh(state, now):
+    r, bodies = state.render, state.bodies
+    n = len(bodies)
+    rows_per_page = max(1, r.hud_rows)
+    selected = r.selected % n
+
+    # the selected body is pinned first, the rest are paged in metric order
+    order = body_order(bodies, r.hud_metric)
+    order = order[order != selected]
+    pages = max(1, math.ceil(len(order) / rows_per_page))
+    r.hud_page %= pages
+    page = order[r.hud_page * rows_per_page:(r.hud_page + 1) * rows_per_page]
+    shown = [selected] + [int(i) for i in page]
+
+    _cache["title"]   = f"BODIES {n}   by {r.hud_metric}   page {r.hud_page + 1}/{pages}"
+    diag = state.worker.diagnostics if state.worker is not None and state.player is None else None
+    _cache["summary"] = aggregate_lines(bodies, diag and diag.latest()) if n > AGGREGATE_OVER else []
+    drift = diag.series("drift") if diag is not None else np.zeros(0)
+    _cache["drift"]   = drift[-1] if len(drift) else None
+    _cache["spark"]   = sparkline_points(drift, SPARK_W, SPARK_H)
+    _cache["rows"]    = [(bodies[i].name + ("  *" if i == selected else ""),
+                          bodies.colors[i], body_lines(bodies[i])) for i in shown]
+    _cache["time"]    = now
+
+
+def draw_hud(state, window_width, window_height, now=None):
+    r = state.render
+    now = rl.get_time() if now is None else now
+    key = (id(state.bodies), len(state.bodies), r.selected, r.hud_metric, r.hud_page, r.hud_rows)
+    if key != _cache["key"] or r.hud_hz <= 0 or now - _cache["time"] >= 1.0 / r.hud_hz:
+        _refresh(state, now)
+        _cache["key"] = key
+
     # --- Body stats panel (top left)
-    panel_width = 220
-    panel_height = 20 + len(state.bodies) * 80
+    summary, rows = _cache["summary"], _cache["rows"]
+    panel_width = 260
+    panel_height = 30 + len(summary) * LINE + (8 if summary else 0) + len(rows) * ROW_HEIGHT
     rl.draw_rectangle(10, 10, panel_width, panel_height, DARK_OVERLAY)
-    rl.draw_text("BODIES", 15, 15, 16, WHITE)
-    for i, body in enumerate(state.bodies):
-        y = 35 + i * 80
-        rl.draw_text(body.name, 15, y,      14, BODY_COLS[i])
-        rl.draw_text(f"pos  x:{body.position.x:.1f} y:{body.position.y:.1f} z:{body.position.z:.1f}", 15, y+18, 12, WHITE)
-        rl.draw_text(f"vel  x:{body.velocity.x:.1f} y:{body.velocity.y:.1f} z:{body.velocity.z:.1f}", 15, y+34, 12, WHITE)
-        rl.draw_text(f"mass {body.mass:.2f}  radius {body.radius:.1f}", 15, y+50, 12, WHITE)
+    rl.draw_text(_cache["title"], 15, 15, 16, WHITE)
+    y = 35
+    for line in summary:
+        rl.draw_text(line, 15, y, 12, WHITE)
+        y += LINE
+    if summary:
+        y += 8
+    for name, color, lines in rows:
+        rl.draw_text(name, 15, y, 14, color)
+        for k, line in enumerate(lines):
+            rl.draw_text(line, 15, y + 18 + 16 * k, 12, WHITE)
+        y += ROW_HEIGHT
 
     # --- Sim info panel (top right)
     sx = window_width - 210
-    rl.draw_rectangle(sx, 10, 200, 90, DARK_OVERLAY)
+    rl.draw_rectangle(sx, 10, 200, 170, DARK_OVERLAY)
     rl.draw_text("SIMULATION",                                    sx+5, 15, 16, WHITE)
     rl.draw_text(f"time       {state.sim.simulation_time:.1f}",  sx+5, 35, 12, WHITE)
     rl.draw_text(f"timescale  {state.sim.time_scale:.2f}",       sx+5, 51, 12, WHITE)
-    rl.draw_text(f"G          {state.sim.gravity_constant:.2f}", sx+5, 67, 12, WHITE)
-    paused = "PAUSED" if state.sim.is_paused else "RUNNING"
-    rl.draw_text(paused,                                          sx+5, 83, 12, WHITE)
+    worker = state.worker
+    steps = worker.governor.steps if worker is not None else 0
+    rl.draw_text(f"steps/tick {steps:<4} dropped {state.sim.dropped_time:.1f}", sx+5, 67, 12, WHITE)
+    rate = f"{worker.rate:.2f}" if worker is not None and not state.sim.is_paused else "-"
+    rl.draw_text(f"sim s/s    {rate}",                            sx+5, 83, 12, WHITE)
+    rl.draw_text(f"G          {state.sim.gravity_constant:.2f}", sx+5, 99, 12, WHITE)
+    # hermite_block always sums directly, show what is actually running
+    backend = active_backend(state.sim)
+    if backend != state.sim.force_backend:
+        backend += f" (not {state.sim.force_backend})"
+    rl.draw_text(f"backend    {backend}",                          sx+5, 115, 12, WHITE)
+    if backend == "particle_mesh":
+        rl.draw_text(f"grid       {state.sim.pm_grid}^3",        sx+5, 131, 12, WHITE)
+    else:
+        rl.draw_text(f"theta      {state.sim.theta:.2f}",        sx+5, 131, 12, WHITE)
+    merging = "  +merge" if state.sim.merge_collisions else ""
+    rl.draw_text(f"integrator {state.sim.integrator}{merging}",  sx+5, 147, 12, WHITE)
+    if state.player is not None:
+        status = f"PLAYBACK {100 * state.player.progress:.0f}%  x{state.player.rate:.2f}"
+    elif worker is not None and worker.error is not None:
+        status = f"ERROR {type(worker.error).__name__}, paused"
+    elif state.sim.is_paused:
+        status = "PAUSED"
+    else:
+        status = "TURBO" if state.sim.is_turbo else "RUNNING"
+    recorder = worker.recorder if worker is not None else None
+    if recorder is not None:
+        status += f"   REC {recorder.frames}"
+    rl.draw_text(status,                                          sx+5, 163, 12, WHITE)
+
+    # --- Energy drift sparkline (under the sim panel)
+    drift = _cache["drift"]
+    rl.draw_rectangle(sx, 186, 200, 60, DARK_OVERLAY)
+    rl.draw_text(f"energy drift {drift:+.2e}" if drift is not None else "energy drift -", sx+5, 190, 12, WHITE)
+    spark, oy = _cache["spark"], 208
+    for (x0, y0), (x1, y1) in zip(spark, spark[1:]):
+        rl.draw_line(sx + 5 + x0, oy + y0, sx + 5 + x1, oy + y1, WHITE)
+
+    if profiler.enabled:
+        draw_profiler(sx, 252)
+
+    # --- Message line (above the footer)
+    if state.message is not None:
+        text, since = state.message
+        if time.monotonic() - since < MESSAGE_SECONDS:
+            rl.draw_rectangle(0, window_height - 62, window_width, 20, DARK_OVERLAY)
+            rl.draw_text(text, 10, window_height - 58, 12, WHITE)
+        else:
+            state.message = None
 
     # --- Controls footer (bottom)
-    rl.draw_rectangle(0, window_height - 30, window_width, 30, DARK_OVERLAY)
+    if state.player is not None:
+        controls = "SPACE pause   LEFT/RIGHT seek (shift x10)   HOME/END   +/- speed   F7 back to live"
+    else:
+        controls = "SPACE pause   F turbo   R reset   F5/F9 save/load   F6 record   F7 playback   +/- timescale   G/shift+G gravity   B backend   I integrator   [/] theta   X mergers   E export diag"
+    rl.draw_rectangle(0, window_height - 40, window_width, 40, DARK_OVERLAY)
+    rl.draw_text(controls, 10, window_height - 35, 12, WHITE)
     rl.draw_text(
-        "SPACE pause   R reset   T trails   V vectors   C components   +/- timescale   G/shift+G gravity",
-        10, window_height - 20, 12, WHITE
+        "T trails   V vectors   C components   TAB select   L/shift+L links   PgUp/PgDn/M bodies   P/shift+P profiler/trace",
+        10, window_height - 19, 12, WHITE
     )
+
+
+def draw_profiler(x, y):
+    """Stacked frame-time bar of the frame loop's phases, physics thread listed below it."""
+    order, background, ms = profiler.order, profiler.background, profiler.ms
+    height = 48 + LINE * (len(order) + len(background))
+    rl.draw_rectangle(x, y, 200, height, DARK_OVERLAY)
+    title = f"FRAME {profiler.frame_ms:.1f} ms"
+    if profiler.tracing:
+        title += f"   TRACE {profiler.remaining}"
+    rl.draw_text(title, x+5, y+4, 12, WHITE)
+
+    # bar: phases stacked left to right, the tick marks one 60 Hz frame
+    bx, by = x + 5, y + 22
+    for k, name in enumerate(order):
+        w = int(round(ms.get(name, 0.0) / BAR_MS * BAR_W))
+        w = min(w, x + 5 + BAR_W - bx)
+        if w > 0:
+            rl.draw_rectangle(bx, by, w, 12, PHASE_RGBA[k % len(PHASE_RGBA)])
+            bx += w
+    tick = x + 5 + BAR_W // 2
+    rl.draw_line(tick, by - 2, tick, by + 14, WHITE)
+
+    ly = y + 40
+    for k, name in enumerate(order):
+        rl.draw_rectangle(x+5, ly + 3, 8, 8, PHASE_RGBA[k % len(PHASE_RGBA)])
+        rl.draw_text(f"{name:<18} {ms.get(name, 0.0):6.2f}", x+18, ly, 12, WHITE)
+        ly += LINE
+    for name in background:
+        rl.draw_text(f"physics {name:<10} {ms.get(name, 0.0):6.2f}", x+18, ly, 12, WHITE)
+        ly += LINE
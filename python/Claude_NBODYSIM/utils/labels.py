@@ -1,14 +1,131 @@
 # utils/labels.py
+"""
+Screen-space labels for 3D positions.
+
+Labels are queued during the 3D pass and drawn by flush_labels() after
+it. The flush keeps its cost bounded however many labels were queued:
+
+    1. every queued position is projected in one numpy pass
+       (no per-label rl.get_world_to_screen)
+    2. labels behind the camera, past MAX_DEPTH or off screen are dropped
+    3. the rest are taken by priority, then nearest first — at most
+       CANDIDATE_BUDGET of them are looked at, at most LABEL_BUDGET drawn
+    4. a coarse occupancy grid over the screen rejects any label that
+       would overlap one already placed
+
+Each distinct string is rasterized once into a texture and reused, so a
+steady scene draws its labels as plain texture blits.
+"""
+from collections import OrderedDict
+import numpy as np
 import pyray as rl
+from scripts.view import project
+
+FONT_SIZE = 16
+
+# labels drawn per frame at most
+LABEL_BUDGET = 64
+
+# queued labels considered per frame, highest priority first
+CANDIDATE_BUDGET = 4096
+
+# overlap grid resolution in pixels
+GRID_CELL = 8
+
+# labels further than this from the camera are not drawn
+MAX_DEPTH = 1e5
+
+# rasterized strings kept on the GPU
+TEXT_CACHE_SIZE = 512
+
+
+class LabelManager:
+
+    def __init__(self):
+        self.positions  = []
+        self.texts      = []
+        self.priorities = []
+        self.offsets    = []
+        self.camera     = None
+        self.textures   = OrderedDict()
+        self.widths     = {}
+
+    def queue(self, position, text, camera, priority=0.0, offset=(0, 0)):
+        self.queue_many([(position.x, position.y, position.z)], [text], camera, [priority], offset)
+
+    def queue_many(self, positions, texts, camera, priorities=None, offset=(0, 0)):
+        """Queue (m, 3) positions with m texts; higher priority wins overlaps."""
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        if priorities is None:
+            priorities = np.zeros(len(positions))
+        self.positions.append(positions)
+        self.texts.extend(texts)
+        self.priorities.append(np.asarray(priorities, dtype=np.float64))
+        self.offsets.append(np.broadcast_to(np.asarray(offset, dtype=np.float64), (len(positions), 2)))
+        self.camera = camera
+
+    def _width(self, text):
+        w = self.widths.get(text)
+        if w is None:
+            if len(self.widths) > 16 * TEXT_CACHE_SIZE:
+                self.widths.clear()
+            w = self.widths[text] = rl.measure_text(text, FONT_SIZE)
+        return w
+
+    def _texture(self, text):
+        tex = self.textures.get(text)
+        if tex is not None:
+            self.textures.move_to_end(text)
+            return tex
+        image = rl.image_text(text, FONT_SIZE, rl.WHITE)
+        tex = rl.load_texture_from_image(image)
+        rl.unload_image(image)
+        self.textures[text] = tex
+        if len(self.textures) > TEXT_CACHE_SIZE:
+            rl.unload_texture(self.textures.popitem(last=False)[1])
+        return tex
+
+    def flush(self):
+        if not self.texts:
+            return
+        positions  = np.concatenate(self.positions)
+        priorities = np.concatenate(self.priorities)
+        offsets    = np.concatenate(self.offsets)
+        texts      = self.texts
+        self.positions, self.texts, self.priorities, self.offsets = [], [], [], []
+
+        w, h = rl.get_screen_width(), rl.get_screen_height()
+        x, y, depth = project(positions, self.camera, w, h)
+        x = x + offsets[:, 0]
+        y = y + offsets[:, 1]
+        ok = np.flatnonzero((depth > 0) & (depth < MAX_DEPTH) &
+                            (x >= 0) & (x < w) & (y >= 0) & (y < h))
+        order = ok[np.lexsort((depth[ok], -priorities[ok]))][:CANDIDATE_BUDGET]
+
+        taken = np.zeros((h // GRID_CELL + 2, w // GRID_CELL + 2), dtype=bool)
+        drawn = 0
+        for i in order:
+            text = texts[i]
+            x0, y0 = int(x[i]), int(y[i])
+            c0, r0 = x0 // GRID_CELL, y0 // GRID_CELL
+            c1 = (x0 + self._width(text)) // GRID_CELL + 1
+            r1 = (y0 + FONT_SIZE) // GRID_CELL + 1
+            if taken[r0:r1, c0:c1].any():
+                continue
+            taken[r0:r1, c0:c1] = True
+            rl.draw_texture(self._texture(text), x0, y0, rl.WHITE)
+            drawn += 1
+            if drawn >= LABEL_BUDGET:
+                break
+
 
+_labels = LabelManager()
 
-pending_labels = []
+def queue_label(position, text, camera, priority=0.0, offset=(0, 0)):
+    _labels.queue(position, text, camera, priority, offset)
 
-def queue_label(position, text, camera):
-    screen_pos = rl.get_world_to_screen(position, camera)
-    pending_labels.append((screen_pos, text))
+def queue_labels(positions, texts, camera, priorities=None, offset=(0, 0)):
+    _labels.queue_many(positions, texts, camera, priorities, offset)
 
 def flush_labels():
-    for screen_pos, text in pending_labels:
-        rl.draw_text(text, int(screen_pos.x), int(screen_pos.y), 16, rl.WHITE)
-    pending_labels.clear()
+    _labels.flush()
@@ -0,0 +1,25 @@
+# utils/palette.py
+
+"""
+Raw (r, g, b, a) tuples for the per-body colours.
+
+Kept free of pyray so bodies can carry their colours around in
+headless runs — pyray draw calls accept these tuples directly, and
+utils/colors.py wraps the same values in rl.Color for everything else.
+"""
+
+BODY_RGBA = [
+    ( 70, 140, 230, 255),   # blue
+    (220,  80,  80, 255),   # red
+    ( 55, 200, 120, 255),   # green
+]
+FORCE_RGBA = [
+    (120, 190, 255, 220),
+    (255, 140, 140, 220),
+    (120, 240, 170, 220),
+]
+TRAIL_RGBA = [
+    ( 70, 140, 230, 120),
+    (220,  80,  80, 120),
+    ( 55, 200, 120, 120),
+]